@@ -0,0 +1,8 @@
+"""
+Headless benchmarks for framed. Run the suite from the root of the
+repository with:
+
+    python -m benchmarks
+
+See benchmarks/__main__.py for its options.
+"""
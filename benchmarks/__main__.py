@@ -0,0 +1,70 @@
+"""
+Runs the benchmark suite, and compares the results to the stored
+baseline. Exits with status 1 if any benchmark's allocations,
+curses calls or cells written grew by more than the threshold.
+Throughput is reported against the baseline, but only as a guide.
+
+    python -m benchmarks                 # run, and compare to the baseline
+    python -m benchmarks --save          # run, and store the results as the baseline
+    python -m benchmarks --filter arrange
+"""
+import argparse
+import os
+import sys
+
+from . import harness
+from . import suite  # noqa: F401 (registers the benchmarks)
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Runs the framed benchmark suite.")
+    parser.add_argument("--baseline", default=BASELINE, help="the baseline to compare to (default: %(default)s)")
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25,
+        help="the fraction by which a counter may exceed the baseline (default: %(default)s)"
+    )
+    parser.add_argument("--filter", default="", help="only run benchmarks whose names contain this")
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds to time each round of a benchmark for")
+    args = parser.parse_args()
+
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        baseline = harness.load_baseline(args.baseline)
+
+    results = {}
+    print("%-28s %14s %14s %14s %14s" % ("benchmark", "ops/sec", "bytes/op", "curses/op", "cells/op"))
+    for name, build in harness.registered().items():
+        if args.filter not in name:
+            continue
+
+        result = results[name] = harness.measure(build(), args.min_time)
+        line = "%-28s %14.0f %14.1f %14.1f %14.1f" % (
+            name, result.ops_per_sec, result.alloc_bytes_per_op, result.curses_calls_per_op,
+            result.cells_written_per_op
+        )
+        expected = baseline.get(name)
+        if expected is not None:
+            line += "   %+6.1f%% ops/sec (not gated)" % ((result.ops_per_sec / expected["ops_per_sec"] - 1) * 100)
+        print(line)
+
+    if args.save:
+        if args.filter and os.path.exists(args.baseline):
+            # keep the stored results of the benchmarks that were not run
+            stored = harness.load_baseline(args.baseline)
+            results = {**{name: harness.Result(**result) for name, result in stored.items()}, **results}
+        harness.save_baseline(args.baseline, results)
+        print("Saved the baseline to %s" % args.baseline)
+        return 0
+
+    regressions = harness.compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print("REGRESSION %s" % regression)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
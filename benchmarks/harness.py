@@ -0,0 +1,175 @@
+"""
+Measures benchmark cases and compares the results to a baseline.
+"""
+import collections
+import contextlib
+from dataclasses import dataclass, asdict
+import functools
+import json
+import time
+import tracemalloc
+import typing
+
+from framed.backend import VirtualBackend, VirtualWindow
+
+
+@dataclass
+class Case:
+    """
+    A prepared benchmark: run() performs `ops` operations each
+    time it is called, against state built once by the benchmark.
+    """
+
+    run: typing.Callable[[], typing.Any]
+    ops: int = 1
+
+
+@dataclass
+class Result:
+    ops_per_sec: float
+    alloc_bytes_per_op: float  # the peak memory allocated while performing one operation
+    curses_calls_per_op: float  # window and screen API calls made per operation
+    cells_written_per_op: float = 0.0  # screen cells changed by doupdate() per operation
+
+
+# the results which do not depend on the speed of the machine, and so are compared to the baseline
+GATED = ("alloc_bytes_per_op", "curses_calls_per_op", "cells_written_per_op")
+
+
+_benchmarks: dict[str, typing.Callable[[], Case]] = {}
+
+
+def benchmark(name: str):
+    """
+    Registers a function which builds a Case under a name.
+    """
+    def register(build: typing.Callable[[], Case]) -> typing.Callable[[], Case]:
+        if name in _benchmarks:
+            raise ValueError("Duplicate benchmark '%s'" % name)
+        _benchmarks[name] = build
+        return build
+
+    return register
+
+
+def registered() -> dict[str, typing.Callable[[], Case]]:
+    return dict(_benchmarks)
+
+
+@contextlib.contextmanager
+def counting_curses_calls(counts: collections.Counter):
+    """
+    Counts calls to the public methods of VirtualWindow, and to
+    VirtualBackend.doupdate(), for the duration of the block. The
+    cells written by each doupdate() are counted as "cells_written".
+    """
+    patched = []
+    for cls in (VirtualWindow, VirtualBackend):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or not callable(method):
+                continue
+            if cls is VirtualBackend and name != "doupdate":
+                continue
+            patched.append((cls, name, method))
+            setattr(cls, name, _counted(counts, name, method))
+    try:
+        yield counts
+    finally:
+        for cls, name, method in patched:
+            setattr(cls, name, method)
+
+
+def _counted(counts: collections.Counter, name: str, method: typing.Callable) -> typing.Callable:
+    if name == "doupdate":
+        @functools.wraps(method)
+        def counted_doupdate(backend: VirtualBackend):
+            counts[name] += 1
+            written = backend.cells_written
+            method(backend)
+            counts["cells_written"] += backend.cells_written - written
+
+        return counted_doupdate
+
+    @functools.wraps(method)
+    def counted(*args, **kwargs):
+        counts[name] += 1
+        return method(*args, **kwargs)
+
+    return counted
+
+
+def measure(case: Case, min_time: float = 0.1, rounds: int = 5) -> Result:
+    """
+    Times the case for rounds of at least min_time seconds each,
+    keeping the fastest round, since slower rounds only measure
+    interference from the rest of the machine.
+    """
+    # warm up any caches the case relies on, as they would be in a running application
+    case.run()
+
+    best = 0.0
+    for _ in range(rounds):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            case.run()
+            calls += 1
+            elapsed = time.perf_counter() - start
+        best = max(best, calls * case.ops / elapsed)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        case.run()
+        allocated = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    counts: collections.Counter = collections.Counter()
+    with counting_curses_calls(counts):
+        case.run()
+
+    cells_written = counts.pop("cells_written", 0)
+    return Result(best, allocated / case.ops, sum(counts.values()) / case.ops, cells_written / case.ops)
+
+
+def compare(
+    results: dict[str, Result], baseline: dict[str, dict[str, float]], threshold: float
+) -> list[str]:
+    """
+    Returns a description of every result whose counters (see
+    GATED) exceed the baseline by more than threshold (a fraction
+    of the baseline). Throughput is not compared: it varies by
+    more than any useful threshold from run to run, let alone
+    between machines.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+
+        for counter in GATED:
+            if counter not in expected:
+                continue
+            value = getattr(result, counter)
+            limit = expected[counter] * (1 + threshold)
+            if counter == "alloc_bytes_per_op":
+                # a few bytes of noise would otherwise fail cases that barely allocate
+                limit += 64
+            if value > limit:
+                regressions.append("%s: %s %.1f, baseline %.1f" % (name, counter, value, expected[counter]))
+    return regressions
+
+
+def load_baseline(path: str) -> dict[str, dict[str, float]]:
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def save_baseline(path: str, results: dict[str, Result]):
+    with open(path, "w") as baseline:
+        json.dump({name: asdict(result) for name, result in sorted(results.items())}, baseline, indent=2)
+        baseline.write("\n")
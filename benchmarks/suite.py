@@ -0,0 +1,262 @@
+"""
+The benchmark cases. Every case is built on a VirtualBackend, so
+the suite runs without a terminal.
+"""
+import framed
+import framed.widgets
+from framed.backend import VirtualBackend
+from framed.layout.fixed import FixedLayout
+from framed.layout.grid import GridLayout
+from framed.manager import MultiplexManager, StackManager
+from framed._tree import _tree
+
+from .harness import Case, benchmark
+
+
+class LabelPanel(framed.Panel):
+    """
+    A panel holding a column of labels.
+    """
+
+    LABELS = 4
+
+    def __init__(self, region: framed.rect2, owner: framed.Manager):
+        super().__init__(region, owner)
+        self.labels = [framed.widgets.Label("label %d" % index) for index in range(self.LABELS)]
+        for label in self.labels:
+            self.add(label)
+
+    def arrange(self):
+        fixed = self.fixed()
+        for index, label in enumerate(self.labels):
+            fixed.add(label, index, 0, 1, 12)
+
+
+class CrowdedPanel(LabelPanel):
+    LABELS = 200
+
+    def arrange(self):
+        grid = self.grid()
+        for index, label in enumerate(self.labels):
+            grid.add(label, index // 4, index % 4)
+
+
+class TallLabelPanel(LabelPanel):
+    LABELS = 8
+
+
+def _sizes(count: int, rows: int = 60, cols: int = 200) -> list[framed.vec2]:
+    # more sizes than any cache holds, so that every arrange or bake does its work
+    return [framed.vec2(rows + index % 16, cols + index) for index in range(count)]
+
+
+def _add_panel(
+    manager: MultiplexManager, path: tuple[int, ...], panel_type: type[LabelPanel] = LabelPanel
+) -> LabelPanel:
+    panel = panel_type(framed.rect2(0, 0, 1, 1), manager)
+    manager.add_panel(panel, path)
+    return panel
+
+
+def _deep_manager(backend: VirtualBackend, depth: int = 10) -> tuple[MultiplexManager, list[LabelPanel]]:
+    # each split holds a panel and the next split, alternating direction
+    manager = MultiplexManager(backend)
+    panels = []
+    path: tuple[int, ...] = ()  # the root split
+    direction = framed.Direction.horizontal
+    for _ in range(depth):
+        first, second = manager.split(2, path, direction)
+        panels.append(_add_panel(manager, first))
+        path = second
+        direction = framed.Direction.vertical if direction is framed.Direction.horizontal else framed.Direction.horizontal
+    panels.append(_add_panel(manager, path))
+    return manager, panels
+
+
+def _wide_manager(backend: VirtualBackend, width: int = 16) -> tuple[MultiplexManager, list[LabelPanel]]:
+    # two rows of panels
+    manager = MultiplexManager(backend, framed.Direction.vertical)
+    panels = [
+        _add_panel(manager, path)
+        for row in manager.split(2)
+        for path in manager.split(width, row, framed.Direction.horizontal)
+    ]
+    return manager, panels
+
+
+def _nested_manager(backend: VirtualBackend) -> tuple[MultiplexManager, list[LabelPanel]]:
+    # 2 x 4 x 4 x 4 = 128 panels
+    manager = MultiplexManager(backend)
+    leaves = []
+    for top in manager.split(2):
+        for middle in manager.split(4, top, framed.Direction.vertical):
+            for bottom in manager.split(4, middle, framed.Direction.horizontal):
+                leaves.extend(manager.split(4, bottom, framed.Direction.vertical))
+    panels = [_add_panel(manager, path, TallLabelPanel) for path in leaves]
+    return manager, panels
+
+
+def _arrange_case(manager: MultiplexManager, sizes: list[framed.vec2] | None = None) -> Case:
+    sizes = _sizes(32) if sizes is None else sizes
+
+    def run():
+        for size in sizes:
+            manager.arrange(size)
+
+    return Case(run, len(sizes))
+
+
+def _decorate_case(manager: MultiplexManager) -> Case:
+    manager.arrange(framed.vec2(60, 200))
+    return Case(manager.decorate)
+
+
+@benchmark("multiplex.arrange.deep")
+def arrange_deep() -> Case:
+    return _arrange_case(_deep_manager(VirtualBackend(80, 240))[0])
+
+
+@benchmark("multiplex.arrange.wide")
+def arrange_wide() -> Case:
+    return _arrange_case(_wide_manager(VirtualBackend(80, 240))[0])
+
+
+@benchmark("multiplex.arrange.128")
+def arrange_nested() -> Case:
+    sizes = [framed.vec2(160 + index % 64, 400 + index // 64) for index in range(64)]
+    return _arrange_case(_nested_manager(VirtualBackend(224, 600))[0], sizes)
+
+
+@benchmark("multiplex.rerender.128")
+def rerender_nested() -> Case:
+    manager, _ = _nested_manager(VirtualBackend(224, 600))
+    sizes = [framed.vec2(200 + index % 16, 580 + index // 16) for index in range(32)]
+    manager.arrange(sizes[0])
+    manager.refresh()
+
+    def run():
+        for size in sizes:
+            manager.arrange(size)
+            manager.refresh()
+
+    return Case(run, len(sizes))
+
+
+@benchmark("multiplex.decorate.deep")
+def decorate_deep() -> Case:
+    return _decorate_case(_deep_manager(VirtualBackend(80, 240))[0])
+
+
+@benchmark("multiplex.decorate.wide")
+def decorate_wide() -> Case:
+    return _decorate_case(_wide_manager(VirtualBackend(80, 240))[0])
+
+
+@benchmark("panel.render.200")
+def panel_render() -> Case:
+    backend = VirtualBackend(60, 200)
+    manager = StackManager(backend)
+    panel = CrowdedPanel(framed.rect2(0, 0, 1, 1), manager)
+    manager.add_panel(panel)
+    manager.arrange(framed.vec2(60, 200))
+    manager.refresh()
+
+    def run():
+        panel.damage()
+        panel.render()
+
+    return Case(run)
+
+
+def _bake_case(layout: FixedLayout | GridLayout) -> Case:
+    sizes = _sizes(16)
+
+    def run():
+        for size in sizes:
+            layout.window_size = size
+            layout.bake()
+
+    return Case(run, len(sizes))
+
+
+@benchmark("layout.fixed.bake.500")
+def fixed_bake() -> Case:
+    layout = FixedLayout()
+    for index in range(500):
+        layout.add(framed.widgets.Label(""), index // 10, index % 10 * 20, 1, 20)
+    return _bake_case(layout)
+
+
+@benchmark("layout.grid.bake.500")
+def grid_bake() -> Case:
+    layout = GridLayout()
+    for index in range(500):
+        layout.add(framed.widgets.Label(""), index // 10, index % 10)
+    return _bake_case(layout)
+
+
+@benchmark("label.set_text.storm")
+def set_text_storm() -> Case:
+    backend = VirtualBackend(60, 200)
+    manager, panels = _wide_manager(backend)
+    manager.arrange(framed.vec2(60, 200))
+    manager.refresh()
+    labels = [label for panel in panels for label in panel.labels]
+    updates = 1000
+    generation = [0]
+
+    def run():
+        generation[0] += 1
+        with manager.batch():
+            for index in range(updates):
+                labels[index % len(labels)].set_text("update %d.%d" % (generation[0], index))
+
+    return Case(run, updates)
+
+
+@benchmark("tree.traverse")
+def tree_traverse() -> Case:
+    # 4 levels of 6 children: 1555 nodes
+    tree = _tree(0)
+    level = [()]
+    for _ in range(4):
+        level = [tree.insert(path, 0) for path in level for _ in range(6)]
+
+    def run():
+        for _ in tree:
+            pass
+
+    return Case(run)
+
+
+@benchmark("app.resize_storm")
+def resize_storm() -> Case:
+    storms = 10
+    resizes = 50
+
+    def run():
+        backend = VirtualBackend(60, 200)
+        app = framed.App(backend)
+        app.set_max_fps(None)
+        app.set_resize_delay(0)
+        manager = app.multiplex(framed.Direction.vertical)
+        for row in manager.split(2):
+            for path in manager.split(8, row, framed.Direction.horizontal):
+                app.new_panel(LabelPanel, path)
+        app.set_control_handler(lambda ch: app.quit())
+
+        remaining = [storms]
+
+        def storm():
+            remaining[0] -= 1
+            for index in range(resizes):
+                backend.resize(40 + index % 20, 120 + remaining[0] * 4 + index)
+            if remaining[0]:
+                app.call_later(0, storm)
+            else:
+                backend.feed("q")
+
+        app.call_later(0, storm)
+        app.run()
+
+    return Case(run, storms)
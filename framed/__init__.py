@@ -1,10 +1,11 @@
 from .app import App
+from .keymap import Keymap
 from .manager import Direction, Manager
 from .panel import Panel
 from .struct import rect2, vec2
 
 __all__ = [
-    "App", "Direction", "Manager", "Panel",
+    "App", "Direction", "Keymap", "Manager", "Panel",
     # struct
     "rect2", "vec2"
 ]
@@ -0,0 +1,39 @@
+from __future__ import annotations
+import collections
+import typing
+
+
+K = typing.TypeVar("K")
+V = typing.TypeVar("V")
+
+
+class LRUCache(typing.Generic[K, V]):
+    """
+    A small mapping which discards its least recently used entry
+    once it holds more than `capacity` entries.
+    """
+
+    __entries: collections.OrderedDict[K, V]
+    __capacity: int
+
+    def __init__(self, capacity: int):
+        self.__entries = collections.OrderedDict()
+        self.__capacity = capacity
+
+    def get(self, key: K) -> V | None:
+        value = self.__entries.get(key)
+        if value is not None:
+            self.__entries.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V):
+        self.__entries[key] = value
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.__capacity:
+            self.__entries.popitem(last=False)
+
+    def clear(self):
+        self.__entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
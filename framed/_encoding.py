@@ -0,0 +1,14 @@
+import locale
+
+
+def unicode_supported(sample: str = "┼") -> bool:
+    """
+    Returns whether the locale's encoding can represent every
+    character of sample, and so whether it can be drawn in place of
+    an ASCII fallback.
+    """
+    try:
+        sample.encode(locale.getpreferredencoding(False))
+    except (LookupError, UnicodeEncodeError):
+        return False
+    return True
@@ -0,0 +1,55 @@
+from __future__ import annotations
+import typing
+
+from .struct import rect2, vec2
+
+
+T = typing.TypeVar("T")
+
+
+class _GridIndex(typing.Generic[T]):
+    """
+    A uniform grid of buckets over a set of regions, for finding the
+    region containing a point without testing every region. Buckets
+    are the size of the average region, so each region falls into a
+    handful of buckets and each bucket holds a handful of regions.
+    Where regions overlap, the one added last is found, as it is the
+    one drawn on top.
+    """
+
+    __cell_h: int
+    __cell_w: int
+    __buckets: dict[tuple[int, int], list[tuple[rect2, T]]]
+
+    def __init__(self, entries: typing.Iterable[tuple[rect2, T]]):
+        entries = [(region, value) for region, value in entries if not region.empty]
+        count = max(1, len(entries))
+        self.__cell_h = max(1, sum(region.h for region, _ in entries) // count)
+        self.__cell_w = max(1, sum(region.w for region, _ in entries) // count)
+        self.__buckets = {}
+
+        cell_h, cell_w = self.__cell_h, self.__cell_w
+        buckets = self.__buckets
+        for entry in entries:
+            region = entry[0]
+            for row in range(region.y // cell_h, (region.y + region.h - 1) // cell_h + 1):
+                for col in range(region.x // cell_w, (region.x + region.w - 1) // cell_w + 1):
+                    bucket = buckets.get((row, col))
+                    if bucket is None:
+                        buckets[(row, col)] = [entry]
+                    else:
+                        bucket.append(entry)
+
+    def at(self, point: vec2) -> tuple[rect2, T] | None:
+        """
+        Returns the topmost region containing point, along with the
+        value it was added with.
+        """
+        bucket = self.__buckets.get((point.y // self.__cell_h, point.x // self.__cell_w))
+        if bucket is None:
+            return None
+
+        for entry in reversed(bucket):
+            if entry[0].contains(point):
+                return entry
+        return None
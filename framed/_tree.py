@@ -10,7 +10,7 @@ class TreeError(Exception):
 T = typing.TypeVar("T")
 
 
-@dataclass
+@dataclass(slots=True)
 class _node(typing.Generic[T]):
     value: T
     children: list[_node[T]]
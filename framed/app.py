@@ -1,45 +1,133 @@
+import asyncio
+import collections
+import contextlib
 import curses
+import selectors
+import time
 import typing
 
+from .backend import Backend
+from .backend.backend import as_backend
+from .keymap import KeyDispatcher, Keymap
 from .manager import Manager, StackManager, MultiplexManager, Direction
+from .loop import FrameScheduler, LoopStats, Timer, TimerQueue, UpdateQueue, Waker
+from .mouse import MouseEvent
 from .panel import Panel
 from .struct import rect2, vec2
-from . import _log
+from .widgets import Widget
+from . import _log, instrument
 
 
 PanelType = typing.TypeVar("PanelType", bound=Panel)
 
+# the markers a terminal encloses pasted text in, once bracketed paste is enabled
+_PASTE_START = b"\x1b[200~"
+_PASTE_END = b"\x1b[201~"
+
 
 class AppError(Exception):
     pass
 
 
 class App:
+    __backend: Backend
     __stdscr: curses.window
     __size: vec2
 
     __running: bool
     __manager: Manager | None
     __control_handler: typing.Callable[[int], typing.Any] | None
+    __text_handler: typing.Callable[[str], typing.Any] | None
+    __keys: KeyDispatcher
+    __focus: Panel | None
+    __pushback: collections.deque[int]  # keys read ahead of the input being handled
+
+    __paste_enabled: bool
+    __paste_handler: typing.Callable[[str], typing.Any] | None
+    __paste: bytearray | None  # the text of the paste in progress
+
+    keymap: Keymap  # the global bindings, which apply whichever panel has focus
+
+    __timers: TimerQueue
+    __frames: FrameScheduler
+    __updates: UpdateQueue
+    __waker: Waker
+    __stats: LoopStats
+    __resize_pending: bool
+    __resize_delay: float
+    __resize_timer: Timer | None
+    __started: bool
+
+    __mouse_enabled: bool
+    __mouse_motion: bool
+    __mouse_handler: typing.Callable[[MouseEvent], typing.Any] | None
+    __mouse_capture: tuple[Panel, Widget | None] | None  # where the drag in progress began
+
+    # only set while running with run_async()
+    __loop: asyncio.AbstractEventLoop | None
+    __stopped: asyncio.Future[None] | None
+    __deadline_handle: asyncio.TimerHandle | None
+    __key_waiters: list[asyncio.Future[int]]
+    __tasks: set[asyncio.Task]
 
-    def __init__(self, stdscr: curses.window):
-        self.__stdscr = stdscr
-        self.__size = vec2(*stdscr.getmaxyx())
+    def __init__(self, stdscr: curses.window | Backend):
+        self.__backend = as_backend(stdscr)
+        self.__stdscr = self.__backend.stdscr
+        self.__size = vec2(*self.__stdscr.getmaxyx())
         self.__running = True
         self.__manager = None
         self.__control_handler = None
+        self.__text_handler = None
+        self.keymap = Keymap()
+        self.__keys = KeyDispatcher(self.__unbound_key)
+        self.__keys.set_scopes([self.keymap])
+        self.__focus = None
+        self.__pushback = collections.deque()
+
+        self.__paste_enabled = False
+        self.__paste_handler = None
+        self.__paste = None
+
+        self.__timers = TimerQueue()
+        self.__frames = FrameScheduler()
+        self.__updates = UpdateQueue()
+        self.__waker = Waker()
+        self.__stats = LoopStats()
+        self.__resize_pending = False
+        self.__resize_delay = 0.05
+        self.__resize_timer = None
+        self.__started = False
+
+        self.__mouse_enabled = False
+        self.__mouse_motion = False
+        self.__mouse_handler = None
+        self.__mouse_capture = None
+
+        self.__loop = None
+        self.__stopped = None
+        self.__deadline_handle = None
+        self.__key_waiters = []
+        self.__tasks = set()
+
+    @property
+    def backend(self) -> Backend:
+        return self.__backend
 
     # --- Layout Configuration Methods ---
-    def stack(self) -> StackManager:
+    def stack(self, max_cached_cells: int | None = None) -> StackManager:
         if self.__manager is not None:
             raise AppError("Manager already assigned!")
-        self.__manager = StackManager(self.__stdscr)
+        self.__manager = StackManager(self.__backend, max_cached_cells)
         return self.__manager
 
-    def multiplex(self, top_level_split_direction: Direction = Direction.horizontal) -> MultiplexManager:
+    def multiplex(
+        self,
+        top_level_split_direction: Direction = Direction.horizontal,
+        ascii_borders: bool | None = None,
+    ) -> MultiplexManager:
         if self.__manager is not None:
             raise AppError("Manager already assigned!")
-        self.__manager = MultiplexManager(self.__stdscr, top_level_split_direction)
+        self.__manager = MultiplexManager(self.__backend, top_level_split_direction, ascii_borders)
         return self.__manager
 
     def new_panel(self, panel_type: type[PanelType], *mgr_args, **mgr_kwargs) -> PanelType:
@@ -52,31 +140,540 @@ class App:
 
     # --- Input Handling Methods ---
     def set_control_handler(self, handler: typing.Callable[[int], typing.Any] | None):
+        """
+        Sets a function to receive the keys which are not bound in
+        any active keymap.
+        """
         self.__control_handler = handler
 
+    def set_text_handler(self, handler: typing.Callable[[str], typing.Any] | None):
+        """
+        Sets a function to receive typed text. Unbound printable
+        keys are then collected rather than passed to the control
+        handler, and each run of them that arrives in one burst of
+        input (such as a paste) is delivered as a single string.
+        """
+        self.__text_handler = handler
+        self.__keys.set_text_handler(handler)
+
+    def set_key_timeout(self, timeout: float, escape_timeout: float | None = None):
+        """
+        Sets how long to wait for the next key of a multi-key
+        binding before running the binding typed so far, if any.
+        After a lone ESC, which may be the start of a meta key, the
+        wait is escape_timeout instead (by default, the escape delay
+        the backend gives curses).
+        """
+        if timeout < 0 or (escape_timeout is not None and escape_timeout < 0):
+            raise AppError("timeout must not be negative!")
+        self.__keys.set_timeout(timeout, escape_timeout)
+
+    def set_focus(self, panel: Panel | None):
+        """
+        Gives a panel the keyboard focus, so that the bindings in
+        its keymap apply (taking priority over the global keymap).
+        """
+        self.__focus = panel
+        self.__keys.set_scopes([self.keymap] if panel is None else [panel.keymap, self.keymap])
+
+    @property
+    def focus(self) -> Panel | None:
+        return self.__focus
+
+    def enable_mouse(self, enabled: bool = True, motion: bool = False):
+        """
+        Enables mouse input. Each mouse event is delivered to the
+        widget under the mouse through Widget.on_mouse(), then to
+        its panel through Panel.on_mouse() if the widget does not
+        handle it, and finally to the mouse handler. Once a button
+        is pressed, events go to the same widget and panel until it
+        is released, so that drags can be followed. If motion is
+        True, moving the mouse is reported too, for hovering.
+        """
+        self.__mouse_enabled = enabled
+        self.__mouse_motion = motion
+        if self.__started:
+            self.__backend.set_mouse(enabled, motion)
+
+    def set_mouse_handler(self, handler: typing.Callable[[MouseEvent], typing.Any] | None):
+        """
+        Sets a function to receive the mouse events which no panel
+        or widget handled.
+        """
+        self.__mouse_handler = handler
+
+    def enable_bracketed_paste(self, enabled: bool = True):
+        """
+        Asks the terminal to mark pasted text, so that a paste is
+        delivered as a single string to the paste handler (or the
+        text handler if there is none) instead of key by key. Keys
+        bound in a keymap are not triggered by pasted text.
+        """
+        self.__paste_enabled = enabled
+        if self.__started:
+            self.__backend.set_bracketed_paste(enabled)
+
+    def set_paste_handler(self, handler: typing.Callable[[str], typing.Any] | None):
+        """
+        Sets a function to receive pasted text, with line endings
+        as "\\n", while bracketed paste is enabled.
+        """
+        self.__paste_handler = handler
+
+    # --- Rendering ---
+    def batch(self) -> typing.ContextManager[typing.Any]:
+        """
+        Groups updates so that any widgets invalidated inside the
+        block are rendered once, and flushed to the terminal with a
+        single doupdate() when the outermost batch exits. Every
+        iteration of the main loop is implicitly batched, and its
+        updates are rendered on the next frame (see set_max_fps).
+        """
+        if self.__manager is None:
+            return contextlib.nullcontext()
+        return self.__manager.batch()
+
+    def set_max_fps(self, max_fps: float | None):
+        """
+        Limits how often the main loop renders. Invalidations that
+        occur between frames are merged into a single render pass.
+        If max_fps is None, a frame is rendered at the end of every
+        iteration of the loop that produced updates.
+        """
+        self.__frames.set_max_fps(max_fps)
+
+    def set_resize_delay(self, delay: float):
+        """
+        Sets how long the terminal size must remain unchanged after
+        a resize before the panels are re-arranged, so that a burst
+        of resize events (such as dragging a window's edge) is only
+        laid out once, at its final size.
+        """
+        if delay < 0:
+            raise AppError("delay must not be negative!")
+        self.__resize_delay = delay
+
+    # --- Timers ---
+    def call_later(self, delay: float, callback: typing.Callable[[], typing.Any]) -> Timer:
+        """
+        Schedules a callback to be invoked on the main loop once,
+        after `delay` seconds.
+        """
+        timer = self.__timers.schedule(delay, callback)
+        self.__timer_added()
+        return timer
+
+    def call_every(self, interval: float, callback: typing.Callable[[], typing.Any]) -> Timer:
+        """
+        Schedules a callback to be invoked on the main loop every
+        `interval` seconds until the returned Timer is cancelled.
+        """
+        if interval <= 0:
+            raise AppError("interval must be greater than 0!")
+        timer = self.__timers.schedule(interval, callback, interval)
+        self.__timer_added()
+        return timer
+
+    def __timer_added(self):
+        # under run_async() nothing waits on the timer queue itself, so the loop callback for
+        # the next deadline has to be moved up if the new timer is due earlier
+        if self.__loop is not None:
+            self.__arm_async()
+
+    # --- Cross-thread Updates ---
+    def call_soon_threadsafe(self, callback: typing.Callable[..., typing.Any], *args):
+        """
+        Schedules a callback to be invoked on the main loop as soon
+        as possible. This may be called from any thread.
+        """
+        self.__updates.put(callback, args)
+        self.__waker.wake()
+
+    def post(self, callback: typing.Callable[..., typing.Any], *args, key: typing.Hashable | None = None):
+        """
+        Like call_soon_threadsafe(), but if a key is given (typically
+        the widget being updated), callbacks posted with the same key
+        are coalesced so that only the most recent one runs. This lets
+        a producer push updates faster than they can be rendered.
+        """
+        self.__updates.put(callback, args, key)
+        self.__waker.wake()
+
+    def wakeup(self):
+        """
+        Interrupts the main loop if it is waiting for input. This may
+        be called from any thread.
+        """
+        self.__waker.wake()
+
+    @property
+    def stats(self) -> LoopStats:
+        return self.__stats
+
     # --- Mainloop ---
     def run(self):
         _log.info("Running application")
-        curses.set_escdelay(25)
-        curses.raw()
-        self.__stdscr.keypad(True)
-        self.__stdscr.nodelay(True)
+        self.__start()
+
+        selector = selectors.DefaultSelector()
+        selector.register(self.__backend.fileno(), selectors.EVENT_READ)
+        selector.register(self.__waker, selectors.EVENT_READ)
+        stop_watching_resize = self.__backend.watch_resize(self.__on_resize)
+        try:
+            while self.__running:
+                self.__run_once(selector)
+        finally:
+            selector.close()
+            stop_watching_resize()
+            self.__stop()
 
+    async def run_async(self):
+        """
+        Runs the application on the running asyncio event loop,
+        returning once quit() is called. Input, timers and frames
+        are all handled by loop callbacks rather than a blocking
+        wait, so the application can share its thread with other
+        coroutines. Widgets may be updated directly from those
+        coroutines: their refreshes are batched and rendered on
+        the next frame, as they are inside the loop's callbacks.
+        """
+        _log.info("Running application on the asyncio event loop")
+        loop = asyncio.get_running_loop()
+        self.__loop = loop
+        self.__stopped = loop.create_future()
+        self.__start()
+
+        loop.add_reader(self.__backend.fileno(), self.__step_async, True, False)
+        loop.add_reader(self.__waker.fileno(), self.__step_async, False, True)
+        stop_watching_resize = self.__backend.watch_resize(self.__on_resize)
+        manager = self.__manager
+        try:
+            with manager.batch(flush=False) if manager is not None else contextlib.nullcontext():
+                if manager is not None:
+                    manager.set_refresh_handler(self.__arm_async)
+                # handle any input that arrived before the readers were added
+                self.__step_async(True, False)
+                await self.__stopped
+        finally:
+            if manager is not None:
+                manager.set_refresh_handler(None)
+            if self.__deadline_handle is not None:
+                self.__deadline_handle.cancel()
+                self.__deadline_handle = None
+            for waiter in self.__key_waiters:
+                waiter.cancel()
+            self.__key_waiters.clear()
+            for task in list(self.__tasks):
+                task.cancel()
+
+            loop.remove_reader(self.__backend.fileno())
+            loop.remove_reader(self.__waker.fileno())
+            stop_watching_resize()
+            self.__stop()
+            self.__loop = None
+            self.__stopped = None
+
+    async def next_key(self) -> int:
+        """
+        Waits for the next key to be pressed while the application
+        is running with run_async(). Whilst any coroutine is waiting
+        for a key, keys are delivered to the waiting coroutines
+        instead of the control handler.
+        """
+        if self.__loop is None:
+            raise AppError("next_key() can only be awaited while running with run_async()!")
+
+        waiter = self.__loop.create_future()
+        self.__key_waiters.append(waiter)
+        return await waiter
+
+    def create_task(self, coroutine: typing.Coroutine[typing.Any, typing.Any, typing.Any]) -> asyncio.Task:
+        """
+        Runs a coroutine alongside the application, such as a task
+        which periodically updates widgets. It is cancelled when
+        run_async() returns.
+        """
+        if self.__loop is None:
+            raise AppError("Tasks can only be created while running with run_async()!")
+
+        task = self.__loop.create_task(coroutine)
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+        return task
+
+    def __start(self):
+        if self.__waker.closed:
+            # closed when the previous run ended; anything posted since is still queued, and the
+            # new waker has to be woken for the loop to drain it without waiting for input
+            self.__waker = Waker()
+            if len(self.__updates):
+                self.__waker.wake()
+        self.__backend.start()
+        self.__started = True
+        if self.__mouse_enabled:
+            self.__backend.set_mouse(True, self.__mouse_motion)
+        if self.__paste_enabled:
+            self.__backend.set_bracketed_paste(True)
         if self.__manager is not None:
-            self.__manager.arrange(self.__size)
+            self.__arrange(self.__manager)
             self.__manager.refresh()
 
+    def __stop(self):
+        if self.__paste_enabled:
+            self.__backend.set_bracketed_paste(False)
+        self.__backend.stop()
+        self.__waker.close()
+
+    def __on_resize(self):
+        self.__resize_pending = True
+        self.__waker.wake()
+
+    def __next_deadline(self) -> float | None:
+        deadline = self.__timers.next_deadline()
+        key_deadline = self.__keys.deadline
+        if key_deadline is not None:
+            deadline = key_deadline if deadline is None else min(deadline, key_deadline)
+        if self.__manager is not None and self.__manager.refresh_pending:
+            frame_deadline = self.__frames.next_frame()
+            deadline = frame_deadline if deadline is None else min(deadline, frame_deadline)
+        return deadline
+
+    def __run_once(self, selector: selectors.BaseSelector):
+        deadline = self.__next_deadline()
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        events = selector.select(timeout)
+
+        input_ready = woken = False
+        for key, _ in events:
+            if key.fileobj is self.__waker:
+                woken = True
+            else:
+                input_ready = True
+        self.__step(input_ready, woken)
+
+    def __step_async(self, input_ready: bool, woken: bool):
+        stopped = self.__stopped
+        if stopped is None or stopped.done():
+            return
+
+        try:
+            self.__step(input_ready, woken)
+        except Exception as error:
+            stopped.set_exception(error)
+            return
+
+        if self.__running:
+            self.__arm_async()
+        else:
+            stopped.set_result(None)
+
+    def __arm_async(self):
+        # schedules a callback for the next timer or frame, replacing the previous one
+        if self.__deadline_handle is not None:
+            self.__deadline_handle.cancel()
+            self.__deadline_handle = None
+
+        deadline = self.__next_deadline()
+        if deadline is not None and self.__loop is not None:
+            delay = max(0.0, deadline - time.monotonic())
+            self.__deadline_handle = self.__loop.call_later(delay, self.__step_async, False, False)
+
+    def __step(self, input_ready: bool, woken: bool):
+        if self.__manager is None:
+            self.__dispatch(input_ready, woken)
+            return
+
+        with self.__manager.batch(flush=False):
+            self.__dispatch(input_ready, woken)
+
+        if self.__manager.refresh_pending and time.monotonic() >= self.__frames.next_frame():
+            self.__render_frame(self.__manager)
+
+    def __render_frame(self, manager: Manager):
+        start = time.monotonic()
+        manager.flush()
+        duration = time.monotonic() - start
+        self.__frames.record(start, duration)
+
+        stats = self.__stats
+        stats.frames += 1
+        stats.frame_time_last = duration
+        if duration > stats.frame_time_max:
+            stats.frame_time_max = duration
+        stats.widgets_rendered += manager.widgets_rendered
+        stats.widgets_skipped += manager.widgets_skipped
+
+    def __dispatch(self, input_ready: bool, woken: bool):
+        instrumentation = instrument.active
+        start = instrumentation.clock() if instrumentation is not None else 0.0
+        now = time.monotonic()
+        stats = self.__stats
+        stats.wakeups += 1
+        if woken:
+            stats.external_wakeups += 1
+            stats.record_latency(now - self.__waker.drain())
+        if input_ready:
+            stats.input_wakeups += 1
+
+        if self.__resize_pending:
+            self.__resize_pending = False
+            # queues a KEY_RESIZE, which is handled along with the rest of the input below
+            self.__backend.sync_size()
+
+        if len(self.__updates):
+            queued = len(self.__updates)
+            invoked = self.__updates.drain()
+            stats.updates_run += invoked
+            stats.updates_coalesced += queued - invoked
+
+        # curses may already hold buffered input that select() cannot see, so
+        # always drain until getch() reports that nothing is left.
+        self.__process_input()
+        self.__keys.expire(now)
+
+        due = self.__timers.pop_due(now)
+        if due:
+            stats.timer_wakeups += 1
+        for deadline, timer in due:
+            stats.record_latency(now - deadline)
+            timer.callback()
+
+        if instrumentation is not None:
+            instrumentation.record("dispatch", start)
+
+    def __process_input(self):
+        now = time.monotonic()
+        keys_read = 0
         while self.__running:
-            ch = self.__stdscr.getch()
+            ch = self.__read_key()
             if ch == -1:
-                continue
+                break
+            keys_read += 1
+            paste = self.__paste
+            if paste is not None and 0 <= ch < 256:
+                self.__read_paste(paste, ch)
             elif ch == curses.KEY_RESIZE:
-                if self.__manager is not None:
-                    self.__manager.arrange(vec2(*self.__stdscr.getmaxyx()))
-                    self.__manager.refresh()
-            elif self.__control_handler:
-                self.__control_handler(ch)
+                self.__size = vec2(*self.__stdscr.getmaxyx())
+                if self.__resize_timer is not None:
+                    self.__resize_timer.cancel()
+                self.__resize_timer = self.call_later(self.__resize_delay, self.__apply_resize)
+            elif ch == curses.KEY_MOUSE:
+                # text typed before the click is delivered before it
+                self.__keys.end_burst()
+                self.__process_mouse()
+            elif ch == _PASTE_START[0] and self.__paste_enabled and self.__starts_paste():
+                # text typed before the paste is delivered before it
+                self.__keys.end_burst()
+                self.__paste = bytearray()
+            elif self.__deliver_key(ch):
+                continue
+            else:
+                self.__keys.feed(ch, now)
+        self.__keys.end_burst()
+        self.__stats.keys_read += keys_read
+
+        instrumentation = instrument.active
+        if instrumentation is not None:
+            instrumentation.count("keys_read", keys_read)
+
+    def __read_key(self) -> int:
+        if self.__pushback:
+            return self.__pushback.popleft()
+        return self.__stdscr.getch()
+
+    def __starts_paste(self) -> bool:
+        # reads ahead to see whether an ESC begins the start marker, putting back what it read if not
+        read = []
+        for expected in _PASTE_START[1:]:
+            ch = self.__read_key()
+            if ch == -1:
+                break
+            read.append(ch)
+            if ch != expected:
+                break
+        else:
+            return True
+        self.__pushback.extendleft(reversed(read))
+        return False
+
+    def __read_paste(self, paste: bytearray, ch: int):
+        paste.append(ch)
+        if ch != _PASTE_END[-1] or not paste.endswith(_PASTE_END):
+            return
+
+        self.__paste = None
+        del paste[-len(_PASTE_END):]
+        handler = self.__paste_handler or self.__text_handler
+        if handler is None:
+            # nothing takes text, so the paste is passed on as unbound keys
+            for key in paste:
+                self.__unbound_key(key)
+            return
+
+        handler(paste.decode("utf-8", "replace").replace("\r\n", "\n").replace("\r", "\n"))
+
+    def __unbound_key(self, ch: int):
+        if self.__control_handler is not None:
+            self.__control_handler(ch)
+
+    def __process_mouse(self):
+        mouse = self.__backend.getmouse()
+        if mouse is None:
+            return
+
+        y, x, buttons = mouse
+        event = MouseEvent(vec2(y, x), buttons)
+        target = self.__mouse_capture
+        if target is None and self.__manager is not None:
+            panel = self.__manager.panel_at(event.position)
+            if panel is not None:
+                target = (panel, panel.widget_at(event.position - panel.position))
+
+        if event.ends_drag:
+            self.__mouse_capture = None
+        elif event.starts_drag and target is not None:
+            self.__mouse_capture = target
+
+        if target is not None and self.__deliver_mouse(event, *target):
+            return
+        if self.__mouse_handler is not None:
+            event.local = event.position
+            self.__mouse_handler(event)
+
+    @staticmethod
+    def __deliver_mouse(event: MouseEvent, panel: Panel, widget: Widget | None) -> bool:
+        if widget is not None:
+            region = panel.widget_region(widget)
+            if region is not None:
+                event.local = event.position - panel.position - vec2(region.y, region.x)
+                if widget.on_mouse(event):
+                    return True
+
+        event.local = event.position - panel.position
+        return panel.on_mouse(event)
+
+    def __deliver_key(self, ch: int) -> bool:
+        waiters, self.__key_waiters = self.__key_waiters, []
+        delivered = False
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(ch)
+                delivered = True
+        return delivered
+
+    def __apply_resize(self):
+        self.__resize_timer = None
+        if self.__manager is not None:
+            self.__arrange(self.__manager)
+            self.__manager.refresh()
+
+    def __arrange(self, manager: Manager):
+        instrumentation = instrument.active
+        start = instrumentation.clock() if instrumentation is not None else 0.0
+        manager.arrange(self.__size)
+        if instrumentation is not None:
+            instrumentation.record("arrange", start)
 
     def quit(self):
         self.__running = False
-
+        self.__waker.wake()
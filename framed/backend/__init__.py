@@ -0,0 +1,8 @@
+from .ansi import AnsiBackend
+from .backend import Backend, CursesBackend
+from .proxy import ProxyBackend, ProxyWindow
+from .virtual import VirtualBackend, VirtualWindow
+
+__all__ = [
+    "AnsiBackend", "Backend", "CursesBackend", "ProxyBackend", "ProxyWindow", "VirtualBackend", "VirtualWindow"
+]
@@ -0,0 +1,219 @@
+from __future__ import annotations
+from array import array
+import curses
+import os
+import sys
+import typing
+
+from .backend import CursesBackend
+from .virtual import VirtualBackend
+from .. import _log, instrument
+
+
+_ESC = "\x1b["
+
+# attribute bits, in the order their SGR parameters are emitted
+_SGR_FLAGS = (
+    (curses.A_BOLD, "1"),
+    (curses.A_DIM, "2"),
+    (curses.A_ITALIC, "3"),
+    (curses.A_UNDERLINE, "4"),
+    (curses.A_BLINK, "5"),
+    (curses.A_REVERSE | curses.A_STANDOUT, "7"),
+    (curses.A_INVIS, "8"),
+)
+
+
+def _color_parameter(color: int, base: int) -> str:
+    if color < 0:
+        return str(base + 9)
+    elif color < 8:
+        return str(base + color)
+    elif color < 16:
+        return str(base + 60 + color - 8)
+    return "%d;5;%d" % (base + 8, color)
+
+
+class AnsiBackend(VirtualBackend):
+    """
+    A Backend which keeps the screen as front and back buffers of
+    codepoints and attributes, and writes the difference between
+    them to the terminal as ANSI escape sequences on doupdate(),
+    bypassing curses' own output. Unchanged cells are skipped,
+    cursor motions take the cheapest available form, and runs of
+    cells with the same attributes share a single SGR sequence.
+
+    curses is still used to put the terminal into the right mode
+    and to decode input, so this is constructed from the stdscr
+    passed to curses.wrapper(). Every cell is assumed to be one
+    column wide.
+    """
+
+    __terminal: CursesBackend
+    __output: int
+    __chunks: list[str]
+    __cursor_y: int  # -1 when the terminal's cursor position is unknown
+    __cursor_x: int
+    __attr: int
+    __sgr: dict[int, str]
+
+    bytes_written: int
+
+    def __init__(self, stdscr: curses.window, output: int | None = None):
+        self.__terminal = CursesBackend(stdscr)
+        rows, cols = stdscr.getmaxyx()
+        super().__init__(rows, cols)
+        self.__output = sys.stdout.fileno() if output is None else output
+        self.__chunks = []
+        self.__cursor_y = self.__cursor_x = -1
+        self.__attr = 0
+        self.__sgr = {}
+        self.bytes_written = 0
+
+    # --- Backend method implementations ---
+    def fileno(self) -> int:
+        return self.__terminal.fileno()
+
+    def start(self):
+        self.__terminal.start()
+        # let curses perform its initial clear before anything is drawn, so that
+        # a later getch() never has a reason to refresh stdscr over our output
+        self.__terminal.stdscr.refresh()
+        # with automatic margins disabled, the bottom-right cell can be written
+        # without scrolling the screen
+        self.__write(_ESC + "?7l")
+
+    def stop(self):
+        self.__write(_ESC + "0m" + _ESC + "?7h")
+
+    def watch_resize(self, callback: typing.Callable[[], typing.Any]) -> typing.Callable[[], None]:
+        return self.__terminal.watch_resize(callback)
+
+    def sync_size(self):
+        self.__terminal.sync_size()
+        self._resize_screen(*self.__terminal.stdscr.getmaxyx())
+
+    def set_mouse(self, enabled: bool, motion: bool = False):
+        self.__terminal.set_mouse(enabled, motion)
+
+    def getmouse(self) -> tuple[int, int, int] | None:
+        return self.__terminal.getmouse()
+
+    def set_bracketed_paste(self, enabled: bool):
+        self.__write(_ESC + ("?2004h" if enabled else "?2004l"))
+
+    def _getch(self) -> int:
+        return self.__terminal.stdscr.getch()
+
+    # --- Rendering ---
+    def _begin_update(self, clear: bool):
+        if clear:
+            self.__chunks.append(_ESC + "0m" + _ESC + "H" + _ESC + "2J")
+            self.__cursor_y = self.__cursor_x = 0
+            self.__attr = 0
+
+    def _update_row(self, y: int, next_chars: array, next_attrs: array, chars: array, attrs: array):
+        if next_chars == chars and next_attrs == attrs:
+            return
+
+        chunks = self.__chunks
+        width = len(chars)
+        x = 0
+        while x < width:
+            if next_chars[x] == chars[x] and next_attrs[x] == attrs[x]:
+                x += 1
+                continue
+
+            self.__move(y, x, next_chars, next_attrs, chars, attrs)
+
+            # emit the run of changed cells, switching attributes only where they differ
+            start = x
+            while x < width and (next_chars[x] != chars[x] or next_attrs[x] != attrs[x]):
+                attr = next_attrs[x]
+                if attr != self.__attr:
+                    if x > start:
+                        chunks.append("".join(map(chr, next_chars[start:x])))
+                        start = x
+                    chunks.append(self.__sgr_for(attr))
+                    self.__attr = attr
+                x += 1
+            chunks.append("".join(map(chr, next_chars[start:x])))
+            self.cells_written += x - start
+
+            if x >= width:
+                # the cursor is left on the last column, which terminals handle inconsistently
+                self.__cursor_y = -1
+            else:
+                self.__cursor_x = x
+
+        chars[:] = next_chars
+        attrs[:] = next_attrs
+
+    def _end_update(self):
+        if self.__chunks:
+            output = "".join(self.__chunks)
+            self.__chunks.clear()
+            self.__write(output)
+
+    def __move(self, y: int, x: int, next_chars: array, next_attrs: array, chars: array, attrs: array):
+        chunks = self.__chunks
+        if self.__cursor_y == y:
+            distance = x - self.__cursor_x
+            if distance == 0:
+                return
+            elif 0 < distance <= 4 and all(
+                # re-sending a short run of unchanged cells is cheaper than a motion sequence,
+                # provided that they do not need an attribute change
+                attrs[index] == self.__attr for index in range(self.__cursor_x, x)
+            ):
+                chunks.append("".join(map(chr, next_chars[self.__cursor_x:x])))
+            elif distance > 0:
+                chunks.append(_ESC + ("%dC" % distance if distance > 1 else "C"))
+            elif x == 0:
+                chunks.append("\r")
+            else:
+                chunks.append(_ESC + ("%dD" % -distance if distance < -1 else "D"))
+        elif x == 0 and self.__cursor_y != -1 and y == self.__cursor_y + 1:
+            chunks.append("\r" + _ESC + "B")
+        else:
+            chunks.append(_ESC + "%d;%dH" % (y + 1, x + 1))
+
+        self.__cursor_y = y
+        self.__cursor_x = x
+
+    def __sgr_for(self, attr: int) -> str:
+        sequence = self.__sgr.get(attr)
+        if sequence is None:
+            parameters = ["0"]
+            for flag, parameter in _SGR_FLAGS:
+                if attr & flag:
+                    parameters.append(parameter)
+
+            pair = curses.pair_number(attr)
+            if pair:
+                try:
+                    foreground, background = curses.pair_content(pair)
+                except curses.error:
+                    foreground = background = -1
+                parameters.append(_color_parameter(foreground, 30))
+                parameters.append(_color_parameter(background, 40))
+
+            sequence = self.__sgr[attr] = _ESC + ";".join(parameters) + "m"
+        return sequence
+
+    def __write(self, text: str):
+        data = text.encode("utf-8", "replace")
+        self.bytes_written += len(data)
+        instrumentation = instrument.active
+        if instrumentation is not None:
+            instrumentation.count("bytes_written", len(data))
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self.__output, view)
+            except InterruptedError:
+                continue
+            except OSError:
+                _log.exception("Failed to write to the terminal")
+                return
+            view = view[written:]
@@ -0,0 +1,183 @@
+from abc import ABCMeta, abstractmethod
+import curses
+import os
+import signal
+import sys
+import typing
+
+from .. import _log
+
+
+# how long curses waits after an ESC for the rest of an escape sequence, in seconds
+ESCAPE_DELAY = 0.025
+
+
+class Backend(metaclass=ABCMeta):
+    """
+    A Backend is the screen that an App, its Manager and its Panels
+    draw to. It is responsible for creating top-level windows,
+    flushing them to the terminal, and supplying input to the
+    main loop. Everything else in framed talks to the windows a
+    Backend creates through the curses window API, so a Backend
+    may substitute its own implementation of that API.
+    """
+
+    @property
+    @abstractmethod
+    def stdscr(self) -> curses.window:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def newwin(self, nlines: int, ncols: int, begin_y: int, begin_x: int) -> curses.window:
+        """
+        Creates a new top-level window, in the manner of
+        curses.newwin().
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def doupdate(self):
+        """
+        Flushes all pending window updates to the screen, in the
+        manner of curses.doupdate().
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def fileno(self) -> int:
+        """
+        Returns a file descriptor which becomes readable when input
+        is available from stdscr.getch().
+        """
+        raise NotImplementedError()
+
+    def start(self):
+        """
+        Prepares the screen for the main loop. Input must be read
+        from stdscr without blocking once this has been called.
+        """
+        pass
+
+    def stop(self):
+        """
+        Called when the main loop exits, to undo anything done by
+        start().
+        """
+        pass
+
+    def watch_resize(self, callback: typing.Callable[[], typing.Any]) -> typing.Callable[[], None]:
+        """
+        Arranges for callback to be invoked (possibly from a signal
+        handler) when the terminal is resized, returning a function
+        which stops watching. The main loop then calls sync_size().
+        """
+        return lambda: None
+
+    def sync_size(self):
+        """
+        Brings the screen up to date with the size of the terminal,
+        queueing a KEY_RESIZE if it changed.
+        """
+        pass
+
+    def set_mouse(self, enabled: bool, motion: bool = False):
+        """
+        Enables or disables the reporting of mouse events, each of
+        which is queued as a KEY_MOUSE. If motion is True, moving
+        the mouse is reported as well as its buttons.
+        """
+        pass
+
+    def getmouse(self) -> tuple[int, int, int] | None:
+        """
+        Returns the position (y, x) and button state of the mouse
+        event which was reported by the last KEY_MOUSE, or None if
+        it cannot be read.
+        """
+        return None
+
+    def set_bracketed_paste(self, enabled: bool):
+        """
+        Asks the terminal to enclose pasted text between the markers
+        ESC [ 200 ~ and ESC [ 201 ~, so that it can be told apart
+        from typing.
+        """
+        pass
+
+
+class CursesBackend(Backend):
+    __stdscr: curses.window
+
+    def __init__(self, stdscr: curses.window):
+        self.__stdscr = stdscr
+
+    @property
+    def stdscr(self) -> curses.window:
+        return self.__stdscr
+
+    def newwin(self, nlines: int, ncols: int, begin_y: int, begin_x: int) -> curses.window:
+        return curses.newwin(nlines, ncols, begin_y, begin_x)
+
+    def doupdate(self):
+        curses.doupdate()
+
+    def fileno(self) -> int:
+        return sys.stdin.fileno()
+
+    def start(self):
+        curses.set_escdelay(round(ESCAPE_DELAY * 1000))
+        curses.raw()
+        self.__stdscr.keypad(True)
+        self.__stdscr.nodelay(True)
+
+    def watch_resize(self, callback: typing.Callable[[], typing.Any]) -> typing.Callable[[], None]:
+        # curses reports resizes through its own SIGWINCH handler, which only takes effect on
+        # the next getch() and so cannot interrupt a blocking select(). Take over the signal
+        # and forward it to the loop instead.
+        def on_resize(signum, frame):
+            callback()
+
+        try:
+            previous = signal.getsignal(signal.SIGWINCH)
+            signal.signal(signal.SIGWINCH, on_resize)
+        except (ValueError, AttributeError):
+            # not running on the main thread, or SIGWINCH is unavailable on this platform
+            return lambda: None
+
+        def restore():
+            signal.signal(signal.SIGWINCH, previous if previous is not None else signal.SIG_DFL)
+
+        return restore
+
+    def sync_size(self):
+        try:
+            terminal_size = os.get_terminal_size(self.fileno())
+            curses.resizeterm(terminal_size.lines, terminal_size.columns)
+        except (OSError, curses.error):
+            _log.exception("Failed to resize terminal")
+
+    def set_mouse(self, enabled: bool, motion: bool = False):
+        mask = 0
+        if enabled:
+            mask = curses.ALL_MOUSE_EVENTS | (curses.REPORT_MOUSE_POSITION if motion else 0)
+            # report presses and releases as they happen, rather than as clicks, so that drags can be followed
+            curses.mouseinterval(0)
+        curses.mousemask(mask)
+
+    def getmouse(self) -> tuple[int, int, int] | None:
+        try:
+            _, x, y, _, buttons = curses.getmouse()
+        except curses.error:
+            return None
+        return y, x, buttons
+
+    def set_bracketed_paste(self, enabled: bool):
+        # curses has no call for this mode, so the sequence is written to the terminal directly
+        sys.stdout.flush()
+        os.write(sys.stdout.fileno(), b"\x1b[?2004h" if enabled else b"\x1b[?2004l")
+
+
+def as_backend(screen: "curses.window | Backend") -> Backend:
+    if isinstance(screen, Backend):
+        return screen
+    return CursesBackend(screen)
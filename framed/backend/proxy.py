@@ -0,0 +1,127 @@
+from __future__ import annotations
+import curses
+import typing
+
+from .backend import Backend
+
+
+class ProxyWindow:
+    """
+    Wraps a window created by a ProxyBackend, forwarding every
+    method call to it after reporting the call to the backend.
+    Windows derived from a ProxyWindow are wrapped in turn, so
+    every window that framed draws to is observed.
+    """
+
+    def __init__(self, backend: ProxyBackend, window: curses.window, window_id: int):
+        self._backend = backend
+        self._window = window
+        self._window_id = window_id
+
+    def __getattr__(self, name: str) -> typing.Any:
+        attribute = getattr(self._window, name)
+        if not callable(attribute):
+            return attribute
+
+        backend = self._backend
+        window_id = self._window_id
+        # windows derived from this one are wrapped as well
+        wrap = name in ("derwin", "subwin")
+
+        def forward(*args: typing.Any) -> typing.Any:
+            backend._on_call(window_id, name, args)
+            result: typing.Any = attribute(*args)
+            return backend._wrap(result) if wrap else result
+
+        # later calls find the forwarding function without going through __getattr__
+        self.__dict__[name] = forward
+        return forward
+
+
+class ProxyBackend(Backend):
+    """
+    A Backend which wraps another, reporting every call made to its
+    windows, and every doupdate(), to _on_call(). Subclasses decide
+    what to do with the calls; attributes of the wrapped backend
+    which are not part of the Backend interface (such as the
+    methods of a VirtualBackend) are still reachable through the
+    proxy.
+    """
+
+    __backend: Backend
+    __stdscr: curses.window
+    __next_id: int
+
+    def __init__(self, backend: Backend):
+        self.__backend = backend
+        self.__next_id = 0
+        self.__stdscr = self._wrap(backend.stdscr)
+
+    @property
+    def backend(self) -> Backend:
+        return self.__backend
+
+    def _on_call(self, window_id: int, name: str, args: tuple):
+        """
+        Called before each call is forwarded. window_id identifies
+        the window the call was made on, in the order in which the
+        windows were created (stdscr is 0), or is -1 for calls made
+        on the backend itself.
+        """
+        pass
+
+    def _on_window(self, window_id: int, window: curses.window):
+        """
+        Called when a window is created, before any calls are made
+        on it.
+        """
+        pass
+
+    def _wrap(self, window: curses.window) -> curses.window:
+        window_id = self.__next_id
+        self.__next_id += 1
+        self._on_window(window_id, window)
+        return typing.cast(curses.window, ProxyWindow(self, window, window_id))
+
+    # --- Backend method implementations ---
+    @property
+    def stdscr(self) -> curses.window:
+        return self.__stdscr
+
+    def newwin(self, nlines: int, ncols: int, begin_y: int, begin_x: int) -> curses.window:
+        self._on_call(-1, "newwin", (nlines, ncols, begin_y, begin_x))
+        return self._wrap(self.__backend.newwin(nlines, ncols, begin_y, begin_x))
+
+    def doupdate(self):
+        self._on_call(-1, "doupdate", ())
+        self.__backend.doupdate()
+
+    def fileno(self) -> int:
+        return self.__backend.fileno()
+
+    def start(self):
+        self.__backend.start()
+
+    def stop(self):
+        self.__backend.stop()
+
+    def watch_resize(self, callback: typing.Callable[[], typing.Any]) -> typing.Callable[[], None]:
+        return self.__backend.watch_resize(callback)
+
+    def sync_size(self):
+        self.__backend.sync_size()
+
+    def set_mouse(self, enabled: bool, motion: bool = False):
+        self.__backend.set_mouse(enabled, motion)
+
+    def getmouse(self) -> tuple[int, int, int] | None:
+        return self.__backend.getmouse()
+
+    def set_bracketed_paste(self, enabled: bool):
+        self.__backend.set_bracketed_paste(enabled)
+
+    def __getattr__(self, name: str) -> typing.Any:
+        if name.startswith("_ProxyBackend__"):
+            # not yet set by __init__
+            raise AttributeError(name)
+        return getattr(self.__backend, name)
@@ -0,0 +1,637 @@
+from __future__ import annotations
+from array import array
+import collections
+import curses
+import typing
+
+from .backend import Backend
+from ..loop import Waker
+
+
+_BLANK = ord(" ")
+
+
+def _blank_row(width: int) -> array:
+    return array("I", [_BLANK]) * width
+
+
+def _empty_row(width: int) -> array:
+    return array("I", [0]) * width
+
+
+def _split_char(ch: str | int, attr: int) -> tuple[str, int]:
+    if isinstance(ch, int):
+        # a chtype: the low bits hold the character and the rest its attributes
+        return chr(ch & curses.A_CHARTEXT), attr | (ch & curses.A_ATTRIBUTES)
+    if len(ch) != 1:
+        raise TypeError("expect str of length 1 or int, got a str of length %d" % len(ch))
+    return ch, attr
+
+
+class VirtualWindow:
+    """
+    An in-memory stand-in for a curses window, implementing the
+    subset of the window API that framed relies on. Each top-level
+    window owns a buffer of cells, stored as parallel arrays of
+    codepoints and attributes. Derived windows share the buffer of
+    the window they were derived from, exactly as they do in curses,
+    and noutrefresh() copies changed rows to the backend's screen.
+    """
+
+    __backend: VirtualBackend
+    __parent: VirtualWindow | None
+    __root: VirtualWindow
+
+    __height: int
+    __width: int
+    __begin_y: int  # relative to the screen for top-level windows, otherwise to the parent
+    __begin_x: int
+    __cursor_y: int
+    __cursor_x: int
+    __attr: int
+
+    __scroll: bool
+    __scroll_top: int
+    __scroll_bottom: int
+    __clear: bool
+
+    # only populated for top-level windows
+    __chars: list[array]
+    __attrs: list[array]
+    __touched: bytearray
+
+    def __init__(self, backend: VirtualBackend, nlines: int, ncols: int, begin_y: int, begin_x: int, parent: VirtualWindow | None = None):
+        if nlines <= 0 or ncols <= 0:
+            raise curses.error("newwin() returned NULL")
+
+        self.__backend = backend
+        self.__parent = parent
+        self.__root = self if parent is None else parent.__root
+        self.__height = nlines
+        self.__width = ncols
+        self.__begin_y = begin_y
+        self.__begin_x = begin_x
+        self.__cursor_y = 0
+        self.__cursor_x = 0
+        self.__attr = 0
+        self.__scroll = False
+        self.__scroll_top = 0
+        self.__scroll_bottom = nlines - 1
+        self.__clear = False
+
+        if parent is None:
+            self.__chars = [_blank_row(ncols) for _ in range(nlines)]
+            self.__attrs = [_empty_row(ncols) for _ in range(nlines)]
+            self.__touched = bytearray(b"\x01") * nlines
+
+    # --- Geometry ---
+    def __origin(self) -> tuple[int, int]:
+        # the offset of this window within its root's buffer
+        y = x = 0
+        window = self
+        while window.__parent is not None:
+            y += window.__begin_y
+            x += window.__begin_x
+            window = window.__parent
+        return y, x
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.__height, self.__width
+
+    def getbegyx(self) -> tuple[int, int]:
+        y, x = self.__origin()
+        return self.__root.__begin_y + y, self.__root.__begin_x + x
+
+    def getparyx(self) -> tuple[int, int]:
+        if self.__parent is None:
+            return -1, -1
+        return self.__begin_y, self.__begin_x
+
+    def getyx(self) -> tuple[int, int]:
+        return self.__cursor_y, self.__cursor_x
+
+    def move(self, y: int, x: int):
+        if not (0 <= y < self.__height and 0 <= x < self.__width):
+            raise curses.error("wmove() returned ERR")
+        self.__cursor_y = y
+        self.__cursor_x = x
+
+    def resize(self, nlines: int, ncols: int):
+        if nlines <= 0 or ncols <= 0:
+            raise curses.error("wresize() returned ERR")
+
+        if self.__parent is not None:
+            if self.__begin_y + nlines > self.__parent.__height or self.__begin_x + ncols > self.__parent.__width:
+                raise curses.error("wresize() returned ERR")
+        else:
+            chars, attrs = self.__chars, self.__attrs
+            for rows, make_row in ((chars, _blank_row), (attrs, _empty_row)):
+                del rows[nlines:]
+                for index, row in enumerate(rows):
+                    if ncols < len(row):
+                        del row[ncols:]
+                    else:
+                        row.extend(make_row(ncols - len(row)))
+                rows.extend(make_row(ncols) for _ in range(nlines - len(rows)))
+            self.__touched = bytearray(b"\x01") * nlines
+
+        self.__height = nlines
+        self.__width = ncols
+        self.__scroll_top = 0
+        self.__scroll_bottom = nlines - 1
+        self.__cursor_y = min(self.__cursor_y, nlines - 1)
+        self.__cursor_x = min(self.__cursor_x, ncols - 1)
+
+    def mvwin(self, new_y: int, new_x: int):
+        if self.__parent is not None:
+            raise curses.error("mvwin() returned ERR")
+
+        rows, cols = self.__backend.size
+        if new_y < 0 or new_x < 0 or new_y + self.__height > rows or new_x + self.__width > cols:
+            raise curses.error("mvwin() returned ERR")
+        self.__begin_y = new_y
+        self.__begin_x = new_x
+        self.touchwin()
+
+    def mvderwin(self, par_y: int, par_x: int):
+        parent = self.__parent
+        if parent is None:
+            raise curses.error("mvderwin() returned ERR")
+        if par_y < 0 or par_x < 0 or par_y + self.__height > parent.__height or par_x + self.__width > parent.__width:
+            raise curses.error("mvderwin() returned ERR")
+        self.__begin_y = par_y
+        self.__begin_x = par_x
+
+    def derwin(self, *args: int) -> VirtualWindow:
+        if len(args) == 2:
+            nlines, ncols = 0, 0
+            begin_y, begin_x = args
+        elif len(args) == 4:
+            nlines, ncols, begin_y, begin_x = args
+        else:
+            raise TypeError("derwin requires 2 or 4 arguments")
+
+        if nlines == 0:
+            nlines = self.__height - begin_y
+        if ncols == 0:
+            ncols = self.__width - begin_x
+
+        if begin_y < 0 or begin_x < 0 or begin_y + nlines > self.__height or begin_x + ncols > self.__width:
+            raise curses.error("derwin() returned NULL")
+        return VirtualWindow(self.__backend, nlines, ncols, begin_y, begin_x, parent=self)
+
+    def subwin(self, *args: int) -> VirtualWindow:
+        # identical to derwin(), except that coordinates are relative to the screen
+        begin_y, begin_x = self.getbegyx()
+        if len(args) == 2:
+            return self.derwin(args[0] - begin_y, args[1] - begin_x)
+        elif len(args) == 4:
+            return self.derwin(args[0], args[1], args[2] - begin_y, args[3] - begin_x)
+        raise TypeError("subwin requires 2 or 4 arguments")
+
+    # --- Output ---
+    def __put(self, y: int, x: int, text: str, attr: int):
+        # writes text onto a single row of this window; the caller ensures that it fits
+        origin_y, origin_x = self.__origin()
+        root = self.__root
+        row = origin_y + y
+        col = origin_x + x
+        length = len(text)
+        root.__chars[row][col:col + length] = array("I", map(ord, text))
+        root.__attrs[row][col:col + length] = array("I", [attr]) * length
+        root.__touched[row] = 1
+
+    def __newline(self) -> bool:
+        # moves the cursor to the start of the next line, scrolling if permitted
+        self.__cursor_x = 0
+        if self.__cursor_y == self.__scroll_bottom or self.__cursor_y == self.__height - 1:
+            if not self.__scroll or self.__cursor_y != self.__scroll_bottom:
+                return False
+            self.scroll(1)
+        else:
+            self.__cursor_y += 1
+        return True
+
+    def __write(self, text: str, attr: int, call: str):
+        attr |= self.__attr
+        width = self.__width
+        index = 0
+        length = len(text)
+        while index < length:
+            end = text.find("\n", index)
+            if end == -1:
+                end = length
+
+            while index < end:
+                chunk = min(end - index, width - self.__cursor_x)
+                self.__put(self.__cursor_y, self.__cursor_x, text[index:index + chunk], attr)
+                index += chunk
+                self.__cursor_x += chunk
+                if self.__cursor_x >= width:
+                    if not self.__newline():
+                        # curses leaves the cursor on the last cell when it cannot advance
+                        self.__cursor_x = width - 1
+                        raise curses.error("%s() returned ERR" % call)
+
+            if end < length:
+                self.clrtoeol()
+                index += 1
+                if not self.__newline():
+                    raise curses.error("%s() returned ERR" % call)
+
+    def addstr(self, *args):
+        if isinstance(args[0], int):
+            self.move(args[0], args[1])
+            args = args[2:]
+        text, attr = args[0], (args[1] if len(args) > 1 else 0)
+        self.__write(text, attr, "addwstr")
+
+    def addnstr(self, *args):
+        if isinstance(args[0], int):
+            self.move(args[0], args[1])
+            args = args[2:]
+        text, n, attr = args[0], args[1], (args[2] if len(args) > 2 else 0)
+        self.__write(text[:n] if n >= 0 else text, attr, "addnwstr")
+
+    def addch(self, *args: typing.Any):
+        # ([y, x,] ch[, attr])
+        attr = 0
+        if len(args) == 4:
+            y, x, ch, attr = args
+            self.move(y, x)
+        elif len(args) == 3:
+            y, x, ch = args
+            self.move(y, x)
+        elif len(args) == 2:
+            ch, attr = args
+        else:
+            (ch,) = args
+        ch, attr = _split_char(ch, attr)
+        self.__write(ch, attr, "addch")
+
+    def hline(self, *args: typing.Any):
+        ch, n = self.__line_args(args)
+        ch, attr = _split_char(ch, 0)
+        count = min(n, self.__width - self.__cursor_x)
+        if count > 0:
+            self.__put(self.__cursor_y, self.__cursor_x, ch * count, attr | self.__attr)
+
+    def vline(self, *args: typing.Any):
+        ch, n = self.__line_args(args)
+        ch, attr = _split_char(ch, 0)
+        for y in range(self.__cursor_y, min(self.__cursor_y + n, self.__height)):
+            self.__put(y, self.__cursor_x, ch, attr | self.__attr)
+
+    def __line_args(self, args: tuple[typing.Any, ...]) -> tuple[str | int, int]:
+        # ([y, x,] ch, n), moving to (y, x) if given
+        if len(args) == 4:
+            y, x, ch, n = args
+            self.move(y, x)
+        else:
+            ch, n = args
+        return ch, n
+
+    def __clear_rows(self, start: int, stop: int, x: int = 0):
+        width = self.__width - x
+        blank = " " * width
+        for y in range(start, stop):
+            self.__put(y, x, blank, 0)
+
+    def erase(self):
+        self.__clear_rows(0, self.__height)
+        self.__cursor_y = self.__cursor_x = 0
+
+    def clear(self):
+        self.erase()
+        self.__clear = True
+
+    def clrtoeol(self):
+        self.__clear_rows(self.__cursor_y, self.__cursor_y + 1, self.__cursor_x)
+
+    def clrtobot(self):
+        self.clrtoeol()
+        self.__clear_rows(self.__cursor_y + 1, self.__height)
+
+    def scroll(self, lines: int = 1):
+        if not self.__scroll:
+            raise curses.error("scroll() returned ERR")
+
+        top, bottom = self.__scroll_top, self.__scroll_bottom
+        origin_y, origin_x = self.__origin()
+        root = self.__root
+        start, stop = origin_x, origin_x + self.__width
+        rows = range(top, bottom + 1) if lines > 0 else range(bottom, top - 1, -1)
+        for y in rows:
+            source = y + lines
+            target = origin_y + y
+            for buffer in (root.__chars, root.__attrs):
+                if top <= source <= bottom:
+                    buffer[target][start:stop] = buffer[origin_y + source][start:stop]
+                else:
+                    fill = _BLANK if buffer is root.__chars else 0
+                    buffer[target][start:stop] = array("I", [fill]) * self.__width
+            root.__touched[target] = 1
+
+    def scrollok(self, flag: bool):
+        self.__scroll = flag
+
+    def setscrreg(self, top: int, bottom: int):
+        if not (0 <= top <= bottom < self.__height):
+            raise curses.error("wsetscrreg() returned ERR")
+        self.__scroll_top = top
+        self.__scroll_bottom = bottom
+
+    def attron(self, attr: int):
+        self.__attr |= attr
+
+    def attroff(self, attr: int):
+        self.__attr &= ~attr
+
+    def attrset(self, attr: int):
+        self.__attr = attr
+
+    # --- Input of screen contents ---
+    def inch(self, *args: int) -> int:
+        y, x = (args[0], args[1]) if args else (self.__cursor_y, self.__cursor_x)
+        if not (0 <= y < self.__height and 0 <= x < self.__width):
+            return 0xffffffff
+        origin_y, origin_x = self.__origin()
+        root = self.__root
+        return root.__chars[origin_y + y][origin_x + x] | root.__attrs[origin_y + y][origin_x + x]
+
+    def instr(self, *args: int) -> bytes:
+        if len(args) >= 2:
+            self.move(args[0], args[1])
+            args = args[2:]
+        count = args[0] if args else self.__width - self.__cursor_x
+        origin_y, origin_x = self.__origin()
+        start = origin_x + self.__cursor_x
+        row = self.__root.__chars[origin_y + self.__cursor_y]
+        text = "".join(map(chr, row[start:start + min(count, self.__width - self.__cursor_x)]))
+        return text.encode()
+
+    # --- Refreshing ---
+    def touchwin(self):
+        self.touchline(0, self.__height)
+
+    def touchline(self, start: int, count: int, changed: bool = True):
+        origin_y, _ = self.__origin()
+        touched = self.__root.__touched
+        for y in range(origin_y + start, origin_y + min(start + count, self.__height)):
+            touched[y] = 1 if changed else 0
+
+    def untouchwin(self):
+        self.touchline(0, self.__height, False)
+
+    def is_wintouched(self) -> bool:
+        origin_y, _ = self.__origin()
+        return any(self.__root.__touched[origin_y:origin_y + self.__height])
+
+    def syncup(self):
+        # derived windows share the change markers of their root window
+        pass
+
+    def clearok(self, flag: bool):
+        self.__clear = flag
+
+    def noutrefresh(self):
+        if self.__clear:
+            self.__clear = False
+            self.__backend._clear_screen()
+
+        origin_y, origin_x = self.__origin()
+        root = self.__root
+        screen_y, screen_x = self.getbegyx()
+        for y in range(self.__height):
+            row = origin_y + y
+            if root.__touched[row]:
+                self.__backend._copy_row(
+                    screen_y + y, screen_x,
+                    root.__chars[row], root.__attrs[row], origin_x, origin_x + self.__width
+                )
+
+        if self.__parent is None:
+            self.__touched = bytearray(self.__height)
+
+    def refresh(self):
+        self.noutrefresh()
+        self.__backend.doupdate()
+
+    # --- Input ---
+    def keypad(self, flag: bool):
+        pass
+
+    def nodelay(self, flag: bool):
+        pass
+
+    def leaveok(self, flag: bool):
+        pass
+
+    def idlok(self, flag: bool):
+        pass
+
+    def getch(self, *args: int) -> int:
+        if args:
+            self.move(*args)
+        return self.__backend._getch()
+
+
+class VirtualBackend(Backend):
+    """
+    A Backend which renders to an in-memory screen rather than a
+    terminal, so that an App can be driven and inspected without
+    a TTY (in tests and benchmarks, for instance). Input is queued
+    with feed(), and the physical contents of the screen after the
+    last doupdate() can be read back with lines() and cell().
+    """
+
+    __rows: int
+    __cols: int
+    __stdscr: VirtualWindow
+
+    # the virtual screen, which windows are copied into by noutrefresh()
+    __next_chars: list[array]
+    __next_attrs: list[array]
+    __next_touched: bytearray
+    # the physical screen, as of the last doupdate()
+    __chars: list[array]
+    __attrs: list[array]
+    __clear: bool
+
+    __input: collections.deque[int]
+    __mouse: collections.deque[tuple[int, int, int]]  # the events reported by each queued KEY_MOUSE
+    __waker: Waker
+    __bracketed_paste: bool
+
+    # counters
+    doupdates: int
+    cells_written: int
+
+    def __init__(self, rows: int = 24, cols: int = 80):
+        self.__rows = rows
+        self.__cols = cols
+        self.__allocate()
+        self.__input = collections.deque()
+        self.__mouse = collections.deque()
+        self.__waker = Waker()
+        self.__bracketed_paste = False
+        self.doupdates = 0
+        self.cells_written = 0
+        self.__stdscr = VirtualWindow(self, rows, cols, 0, 0)
+
+    def __allocate(self):
+        rows, cols = self.__rows, self.__cols
+        self.__next_chars = [_blank_row(cols) for _ in range(rows)]
+        self.__next_attrs = [_empty_row(cols) for _ in range(rows)]
+        self.__next_touched = bytearray(rows)
+        self.__chars = [_blank_row(cols) for _ in range(rows)]
+        self.__attrs = [_empty_row(cols) for _ in range(rows)]
+        self.__clear = True
+
+    # --- Backend method implementations ---
+    @property
+    def stdscr(self) -> curses.window:
+        return typing.cast(curses.window, self.__stdscr)
+
+    def newwin(self, nlines: int, ncols: int, begin_y: int, begin_x: int) -> curses.window:
+        return typing.cast(curses.window, VirtualWindow(self, nlines, ncols, begin_y, begin_x))
+
+    def doupdate(self):
+        self.doupdates += 1
+        clear = self.__clear
+        self.__clear = False
+        if clear:
+            for chars, attrs in zip(self.__chars, self.__attrs):
+                chars[:] = _blank_row(self.__cols)
+                attrs[:] = _empty_row(self.__cols)
+
+        self._begin_update(clear)
+        for y in range(self.__rows):
+            if clear or self.__next_touched[y]:
+                self._update_row(y, self.__next_chars[y], self.__next_attrs[y], self.__chars[y], self.__attrs[y])
+        self.__next_touched = bytearray(self.__rows)
+        self._end_update()
+
+    def _begin_update(self, clear: bool):
+        """
+        Called at the start of doupdate(). If clear is True, the
+        physical screen has just been reset to blank cells.
+        """
+        pass
+
+    def _update_row(self, y: int, next_chars: array, next_attrs: array, chars: array, attrs: array):
+        """
+        Brings a row of the physical screen (chars, attrs) up to
+        date with the virtual screen (next_chars, next_attrs).
+        """
+        if next_chars != chars or next_attrs != attrs:
+            self.cells_written += sum(
+                1 for index in range(len(chars))
+                if next_chars[index] != chars[index] or next_attrs[index] != attrs[index]
+            )
+            chars[:] = next_chars
+            attrs[:] = next_attrs
+
+    def _end_update(self):
+        pass
+
+    def fileno(self) -> int:
+        return self.__waker.fileno()
+
+    def getmouse(self) -> tuple[int, int, int] | None:
+        try:
+            return self.__mouse.popleft()
+        except IndexError:
+            return None
+
+    def set_bracketed_paste(self, enabled: bool):
+        self.__bracketed_paste = enabled
+
+    # --- Internal interface used by VirtualWindow ---
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.__rows, self.__cols
+
+    def _clear_screen(self):
+        self.__clear = True
+
+    def _copy_row(self, y: int, x: int, chars: array, attrs: array, start: int, stop: int):
+        if not 0 <= y < self.__rows:
+            return
+
+        # clip the row to the screen
+        if x < 0:
+            start -= x
+            x = 0
+        stop = min(stop, start + self.__cols - x)
+        if stop <= start:
+            return
+
+        self.__next_chars[y][x:x + stop - start] = chars[start:stop]
+        self.__next_attrs[y][x:x + stop - start] = attrs[start:stop]
+        self.__next_touched[y] = 1
+
+    def _getch(self) -> int:
+        try:
+            return self.__input.popleft()
+        except IndexError:
+            self.__waker.drain()
+            return -1
+
+    # --- VirtualBackend-specific methods ---
+    def feed(self, *keys: int | str):
+        """
+        Queues input, to be returned by stdscr.getch(). Strings are
+        queued one character at a time.
+        """
+        for key in keys:
+            if isinstance(key, str):
+                self.__input.extend(map(ord, key))
+            else:
+                self.__input.append(key)
+        self.__waker.wake()
+
+    def feed_mouse(self, y: int, x: int, buttons: int):
+        """
+        Queues a mouse event at a position of the screen, with a
+        curses button state (such as curses.BUTTON1_PRESSED).
+        """
+        self.__mouse.append((y, x, buttons))
+        self.feed(curses.KEY_MOUSE)
+
+    def feed_paste(self, text: str):
+        """
+        Queues text as a terminal would send it when pasted: as
+        UTF-8 bytes, enclosed in paste markers if bracketed paste
+        has been enabled.
+        """
+        data = text.encode("utf-8")
+        if self.__bracketed_paste:
+            data = b"\x1b[200~" + data + b"\x1b[201~"
+        self.__input.extend(data)
+        self.__waker.wake()
+
+    def resize(self, rows: int, cols: int):
+        """
+        Simulates the terminal being resized, queueing a KEY_RESIZE.
+        """
+        self._resize_screen(rows, cols)
+        self.feed(curses.KEY_RESIZE)
+
+    def _resize_screen(self, rows: int, cols: int):
+        self.__rows = rows
+        self.__cols = cols
+        self.__allocate()
+        self.__stdscr.resize(rows, cols)
+
+    def lines(self) -> list[str]:
+        """
+        Returns the text shown on each row of the screen.
+        """
+        return ["".join(map(chr, row)) for row in self.__chars]
+
+    def cell(self, y: int, x: int) -> tuple[str, int]:
+        """
+        Returns the character and attributes shown at a position.
+        """
+        return chr(self.__chars[y][x]), self.__attrs[y][x]
@@ -0,0 +1,261 @@
+"""
+Opt-in instrumentation of framed's hot paths. While no
+Instrumentation is enabled, each instrumented site costs a single
+global lookup and comparison with None.
+
+    instrumentation = framed.instrument.enable()
+    instrumentation.add_listener(lambda frame: print(frame.timings))
+
+Timings are accumulated per frame (a frame ends with each flush of
+the manager to the screen) and kept in rolling histograms, both in
+total and for each panel that the time was spent on. Counting calls
+to curses needs the backend to be wrapped with counting().
+"bytes_written" is only reported by AnsiBackend, the one backend
+which writes to the terminal itself: curses' own output cannot be
+measured, and VirtualBackend writes nothing.
+"""
+from __future__ import annotations
+import bisect
+import collections
+import curses
+from dataclasses import dataclass, field
+import math
+import time
+import typing
+import weakref
+
+from .backend.backend import Backend, as_backend
+from .backend.proxy import ProxyBackend
+
+
+# the calls which write text to a window, whose length is counted by counting()
+_DRAWING_CALLS = frozenset(("addstr", "addnstr", "addch", "insstr", "insnstr", "insch", "hline", "vline"))
+
+
+@dataclass(slots=True)
+class Frame:
+    number: int
+    timings: dict[str, float] = field(default_factory=dict)  # seconds spent in each instrumented site
+    counts: dict[str, int] = field(default_factory=dict)
+    panels: dict[Panel, dict[str, float]] = field(default_factory=dict)  # the timings spent on each panel
+
+
+class Histogram:
+    """
+    The most recent samples of a metric, one per frame.
+    """
+
+    __samples: collections.deque[float]
+
+    def __init__(self, history: int):
+        self.__samples = collections.deque(maxlen=history)
+
+    def add(self, value: float):
+        self.__samples.append(value)
+
+    def __len__(self) -> int:
+        return len(self.__samples)
+
+    @property
+    def last(self) -> float:
+        return self.__samples[-1] if self.__samples else 0.0
+
+    @property
+    def mean(self) -> float:
+        return sum(self.__samples) / len(self.__samples) if self.__samples else 0.0
+
+    @property
+    def maximum(self) -> float:
+        return max(self.__samples, default=0.0)
+
+    def percentile(self, percent: float) -> float:
+        if not self.__samples:
+            return 0.0
+        ordered = sorted(self.__samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def buckets(self, bounds: typing.Sequence[float]) -> list[int]:
+        """
+        Counts the samples falling into each of the buckets which
+        the ascending bounds divide the range of values into: below
+        bounds[0], between each pair of bounds, and from bounds[-1]
+        upwards.
+        """
+        counts = [0] * (len(bounds) + 1)
+        for sample in self.__samples:
+            counts[bisect.bisect_right(bounds, sample)] += 1
+        return counts
+
+
+class Instrumentation:
+    """
+    Collects the timings and counts reported by instrumented sites
+    while it is enabled. At the end of each frame, the frame's
+    totals are added to the histograms and passed to each listener.
+    """
+
+    HISTORY = 600
+
+    __history: int
+    __frame: Frame
+    __timings: dict[str, Histogram]
+    __counts: dict[str, Histogram]
+    __panel_timings: weakref.WeakKeyDictionary[Panel, dict[str, Histogram]]
+    __listeners: list[typing.Callable[[Frame], typing.Any]]
+    __frame_start: float
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, history: int | None = None):
+        self.__history = self.HISTORY if history is None else history
+        self.__frame = Frame(0)
+        self.__timings = {}
+        self.__counts = {}
+        self.__panel_timings = weakref.WeakKeyDictionary()
+        self.__listeners = []
+        self.__frame_start = self.clock()
+
+    # --- Reporting, used by instrumented sites ---
+    def record(self, name: str, start: float, panel: Panel | None = None):
+        """
+        Adds the time elapsed since start (as returned by clock())
+        to the current frame's total for name, and to the panel's
+        own total for name if the time was spent on a panel.
+        """
+        elapsed = self.clock() - start
+        timings = self.__frame.timings
+        timings[name] = timings.get(name, 0.0) + elapsed
+        if panel is not None:
+            timings = self.__frame.panels.get(panel)
+            if timings is None:
+                timings = self.__frame.panels[panel] = {}
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+    def count(self, name: str, amount: int = 1):
+        counts = self.__frame.counts
+        counts[name] = counts.get(name, 0) + amount
+
+    def end_frame(self):
+        frame = self.__frame
+        now = self.clock()
+        frame.timings["frame"] = now - self.__frame_start
+        self.__frame_start = now
+        self.__frame = Frame(frame.number + 1)
+
+        for name, value in frame.timings.items():
+            self.__histogram(self.__timings, name).add(value)
+        # every count is sampled each frame, so that frames without any calls are counted as zero
+        for panel, timings in frame.panels.items():
+            histograms = self.__panel_timings.get(panel)
+            if histograms is None:
+                histograms = self.__panel_timings[panel] = {}
+            for name, value in timings.items():
+                self.__histogram(histograms, name).add(value)
+        for name in frame.counts.keys() - self.__counts.keys():
+            self.__histogram(self.__counts, name)
+        for name, histogram in self.__counts.items():
+            histogram.add(frame.counts.get(name, 0))
+
+        for listener in self.__listeners:
+            listener(frame)
+
+    def __histogram(self, histograms: dict[str, Histogram], name: str) -> Histogram:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram(self.__history)
+        return histogram
+
+    # --- Results ---
+    @property
+    def frames(self) -> int:
+        return self.__frame.number
+
+    @property
+    def timings(self) -> dict[str, Histogram]:
+        """
+        The time per frame spent in each instrumented site, in
+        seconds. "frame" is the time between the ends of frames.
+        """
+        return dict(self.__timings)
+
+    @property
+    def counts(self) -> dict[str, Histogram]:
+        return dict(self.__counts)
+
+    @property
+    def panel_timings(self) -> dict[Panel, dict[str, Histogram]]:
+        """
+        The time per frame spent on each panel, by site, for the
+        frames in which any was spent on it. Panels are forgotten
+        once they are no longer in use.
+        """
+        return {panel: dict(histograms) for panel, histograms in self.__panel_timings.items()}
+
+    def add_listener(self, listener: typing.Callable[[Frame], typing.Any]):
+        """
+        Calls listener with each frame as it ends. Listeners are
+        called while the manager is flushing, so they must not
+        refresh the screen themselves.
+        """
+        self.__listeners.append(listener)
+
+    def remove_listener(self, listener: typing.Callable[[Frame], typing.Any]):
+        self.__listeners.remove(listener)
+
+
+# the enabled Instrumentation, checked by every instrumented site
+active: Instrumentation | None = None
+
+
+def enable(instrumentation: Instrumentation | None = None) -> Instrumentation:
+    global active
+    active = Instrumentation() if instrumentation is None else instrumentation
+    return active
+
+
+def disable():
+    global active
+    active = None
+
+
+class _CountingBackend(ProxyBackend):
+    def _on_call(self, window_id: int, name: str, args: tuple):
+        instrumentation = active
+        if instrumentation is None:
+            return
+
+        instrumentation.count("curses_calls")
+        if name in _DRAWING_CALLS:
+            instrumentation.count("chars_drawn", _drawn_length(name, args))
+
+
+def _drawn_length(name: str, args: tuple[typing.Any, ...]) -> int:
+    if name in ("hline", "vline"):
+        # ([y, x,] ch, n)
+        return args[-1]
+
+    # the text follows the optional coordinates, and is followed by a limit for the "n" calls
+    for index, arg in enumerate(args):
+        if isinstance(arg, (str, bytes)):
+            if name in ("addnstr", "insnstr") and index + 1 < len(args):
+                return min(len(arg), args[index + 1])
+            return len(arg)
+    # a single character, given by its code
+    return 1
+
+
+def counting(screen: curses.window | Backend) -> Backend:
+    """
+    Wraps a screen so that every call made to its windows, and the
+    number of characters drawn, are counted by the enabled
+    Instrumentation (as "curses_calls" and "chars_drawn"). Pass the
+    result to App in place of the screen. The bytes these calls
+    send to the terminal are only counted when the screen is an
+    AnsiBackend (see the module's documentation).
+    """
+    return _CountingBackend(as_backend(screen))
+
+
+if typing.TYPE_CHECKING:
+    from .panel import Panel
@@ -0,0 +1,293 @@
+from __future__ import annotations
+import codecs
+import curses
+import typing
+
+from .backend.backend import ESCAPE_DELAY
+
+
+class KeymapError(Exception):
+    pass
+
+
+Action = typing.Callable[[], typing.Any]
+KeySpec = typing.Union[str, int, typing.Sequence[typing.Union[str, int]]]
+
+
+_NAMED_KEYS = {
+    "ESC": 27, "TAB": 9, "RET": 10, "SPC": 32, "DEL": 127,
+    "BS": curses.KEY_BACKSPACE, "Up": curses.KEY_UP, "Down": curses.KEY_DOWN,
+    "Left": curses.KEY_LEFT, "Right": curses.KEY_RIGHT, "Home": curses.KEY_HOME, "End": curses.KEY_END,
+    "PgUp": curses.KEY_PPAGE, "PgDn": curses.KEY_NPAGE, "Ins": curses.KEY_IC, "Delete": curses.KEY_DC,
+    **{"F%d" % number: curses.KEY_F0 + number for number in range(1, 13)},
+}
+
+
+def _parse_key(token: str) -> tuple[int, ...]:
+    if token.startswith("M-") and len(token) > 2:
+        # terminals send meta as an escape prefix
+        return (27,) + _parse_key(token[2:])
+    if token.startswith("C-") and len(token) > 2:
+        base = _parse_key(token[2:])
+        if len(base) != 1 or not 0x40 <= (base[0] & ~0x20) <= 0x5f:
+            raise KeymapError("No control key for '%s'" % token)
+        return (base[0] & 0x1f,)
+    if token in _NAMED_KEYS:
+        return (_NAMED_KEYS[token],)
+    if len(token) == 1:
+        return (ord(token),)
+    raise KeymapError("Unknown key '%s'" % token)
+
+
+def parse_keys(spec: KeySpec) -> tuple[int, ...]:
+    """
+    Converts a description of a key sequence to the key codes that
+    getch() returns for it. A description is either a key code, or
+    a string of space-separated keys ("C-x C-s", "g g", "M-x", "F1",
+    "SPC"), or a sequence of key codes and such strings.
+    """
+    if isinstance(spec, int):
+        return (spec,)
+    if isinstance(spec, str):
+        keys = tuple(code for token in spec.split() for code in _parse_key(token))
+    else:
+        keys = tuple(code for part in spec for code in parse_keys(part))
+    if not keys:
+        raise KeymapError("A key sequence must contain at least one key!")
+    return keys
+
+
+class _KeyNode:
+    __slots__ = ("children", "action")
+
+    children: dict[int, _KeyNode]
+    action: Action | None
+
+    def __init__(self):
+        self.children = {}
+        self.action = None
+
+
+class Keymap:
+    """
+    A set of bindings from key sequences to actions, stored as a
+    prefix trie, so that finding the binding for each key costs a
+    single dictionary lookup however many bindings there are.
+    """
+
+    __root: _KeyNode
+    __bindings: int
+
+    def __init__(self, bindings: typing.Mapping[KeySpec, Action] | None = None):
+        self.__root = _KeyNode()
+        self.__bindings = 0
+        if bindings is not None:
+            for keys, action in bindings.items():
+                self.bind(keys, action)
+
+    def bind(self, keys: KeySpec, action: Action):
+        node = self.__root
+        for key in parse_keys(keys):
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = _KeyNode()
+            node = child
+        if node.action is None:
+            self.__bindings += 1
+        node.action = action
+
+    def unbind(self, keys: KeySpec):
+        path = [self.__root]
+        codes = parse_keys(keys)
+        for key in codes:
+            child = path[-1].children.get(key)
+            if child is None:
+                raise KeymapError("No binding for '%s'" % str(keys))
+            path.append(child)
+        if path[-1].action is None:
+            raise KeymapError("No binding for '%s'" % str(keys))
+
+        path[-1].action = None
+        self.__bindings -= 1
+        # prune the nodes which no longer lead to any binding
+        for index in range(len(codes) - 1, -1, -1):
+            node = path[index + 1]
+            if node.action is not None or node.children:
+                break
+            del path[index].children[codes[index]]
+
+    def lookup(self, keys: KeySpec) -> Action | None:
+        node = self.__root
+        for key in parse_keys(keys):
+            node = node.children.get(key)
+            if node is None:
+                return None
+        return node.action
+
+    def __len__(self) -> int:
+        return self.__bindings
+
+    @property
+    def _root(self) -> _KeyNode:
+        return self.__root
+
+
+class KeyDispatcher:
+    """
+    Feeds keys through a stack of Keymaps, highest priority first.
+    When the keys so far are a prefix of a longer binding, the
+    dispatcher waits for the next key; if none arrives by the
+    deadline, the longest complete binding is run instead, and the
+    keys typed after it are fed through again. Keys
+    which are not bound are passed to the fallback, except that
+    runs of unbound printable keys are collected and passed to the
+    text handler as one string when the burst of input they arrived
+    in ends (see end_burst()), so that pasting is handled at once.
+    """
+
+    TIMEOUT = 1.0
+    # a lone ESC only begins a longer binding (such as "M-x") if the terminal sent the rest with it
+    ESCAPE_TIMEOUT = ESCAPE_DELAY
+
+    __scopes: list[Keymap]
+    __fallback: typing.Callable[[int], typing.Any] | None
+    __text_handler: typing.Callable[[str], typing.Any] | None
+    __timeout: float
+    __escape_timeout: float
+
+    # the sequence in progress: the keys so far, and the node each scope has reached for them
+    __pending_keys: list[int]
+    __pending_nodes: list[_KeyNode]
+    __match: tuple[Action, int] | None  # the longest complete binding so far, and its length
+    __deadline: float | None
+
+    __text: list[str]
+    __decoder: codecs.IncrementalDecoder
+
+    def __init__(
+        self,
+        fallback: typing.Callable[[int], typing.Any] | None = None,
+        timeout: float | None = None,
+        escape_timeout: float | None = None,
+    ):
+        self.__scopes = []
+        self.__fallback = fallback
+        self.__text_handler = None
+        self.__timeout = self.TIMEOUT if timeout is None else timeout
+        self.__escape_timeout = self.ESCAPE_TIMEOUT if escape_timeout is None else escape_timeout
+        self.__pending_keys = []
+        self.__pending_nodes = []
+        self.__match = None
+        self.__deadline = None
+        self.__text = []
+        self.__decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+    def set_scopes(self, scopes: typing.Sequence[Keymap]):
+        """
+        Replaces the keymaps which keys are looked up in, highest
+        priority first. Any sequence in progress is abandoned.
+        """
+        self.__scopes = list(scopes)
+        self.__pending_keys.clear()
+        self.__pending_nodes.clear()
+        self.__match = None
+        self.__deadline = None
+
+    def set_fallback(self, fallback: typing.Callable[[int], typing.Any] | None):
+        self.__fallback = fallback
+
+    def set_text_handler(self, handler: typing.Callable[[str], typing.Any] | None):
+        self.__text_handler = handler
+
+    def set_timeout(self, timeout: float, escape_timeout: float | None = None):
+        """
+        Sets how long to wait for the next key of a sequence, and
+        optionally how long to wait after a lone ESC, which should
+        match the terminal's escape delay.
+        """
+        self.__timeout = timeout
+        if escape_timeout is not None:
+            self.__escape_timeout = escape_timeout
+
+    @property
+    def deadline(self) -> float | None:
+        """
+        The time at which the sequence in progress will be resolved
+        by expire(), if there is one.
+        """
+        return self.__deadline
+
+    def feed(self, key: int, now: float):
+        if self.__pending_nodes:
+            nodes = [child for node in self.__pending_nodes if (child := node.children.get(key)) is not None]
+            if not nodes:
+                # the sequence in progress ends here; the key then starts afresh
+                self.__resolve(now)
+                self.feed(key, now)
+                return
+            self.__pending_keys.append(key)
+        else:
+            nodes = [child for scope in self.__scopes if (child := scope._root.children.get(key)) is not None]
+            if not nodes:
+                self.__unbound(key)
+                return
+            self.__flush_text()
+            self.__pending_keys.append(key)
+
+        self.__pending_nodes = nodes
+        for node in nodes:
+            if node.action is not None:
+                self.__match = (node.action, len(self.__pending_keys))
+                break
+
+        if any(node.children for node in nodes):
+            single_escape = len(self.__pending_keys) == 1 and key == 27
+            self.__deadline = now + (self.__escape_timeout if single_escape else self.__timeout)
+        else:
+            self.__resolve(now)
+
+    def expire(self, now: float):
+        if self.__deadline is not None and now >= self.__deadline:
+            self.__resolve(now)
+
+    def end_burst(self):
+        """
+        Delivers any text collected from the input read so far.
+        """
+        self.__flush_text()
+
+    def __resolve(self, now: float):
+        keys, self.__pending_keys = self.__pending_keys, []
+        self.__pending_nodes = []
+        match, self.__match = self.__match, None
+        self.__deadline = None
+
+        if match is not None:
+            action, length = match
+            action()
+        else:
+            # no binding was completed, so the first key is passed on as it is
+            self.__unbound(keys[0])
+            length = 1
+
+        # the keys after the binding may begin another
+        for key in keys[length:]:
+            self.feed(key, now)
+
+    def __unbound(self, key: int):
+        if self.__text_handler is not None and (32 <= key < 127 or 128 <= key < 256):
+            # bytes above 127 are parts of UTF-8 encoded characters
+            self.__text.append(self.__decoder.decode(bytes((key,))))
+            return
+
+        self.__flush_text()
+        if self.__fallback is not None:
+            self.__fallback(key)
+
+    def __flush_text(self):
+        if not self.__text:
+            return
+        text = "".join(self.__text)
+        self.__text.clear()
+        if text and self.__text_handler is not None:
+            self.__text_handler(text)
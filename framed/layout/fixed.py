@@ -1,6 +1,7 @@
 import curses
 
-from .layout import Layout, LayoutError
+from .layout import Layout, LayoutError, BAKE_CACHE_SIZE
+from .._cache import LRUCache
 from ..struct import rect2, vec2
 from ..widgets import Widget
 
@@ -8,10 +9,14 @@ from ..widgets import Widget
 class FixedLayout(Layout):
     __positions: dict[Widget, rect2]
     __constrained: dict[Widget, rect2]
+    __bakes: LRUCache[vec2, dict[Widget, rect2]]  # bakes of __baked_positions, by window size
+    __baked_positions: dict[Widget, rect2]
 
     def __init__(self):
         self.__positions = {}
         self.__constrained = {}
+        self.__bakes = LRUCache(BAKE_CACHE_SIZE)
+        self.__baked_positions = {}
 
     def add(self, widget: Widget, y: int, x: int, height: int, width: int):
         if widget in self.__positions:
@@ -23,10 +28,26 @@ class FixedLayout(Layout):
         self.__positions[widget] = rect2(y, x, height, width)
 
     def reset(self):
-        self.__positions.clear()
-        self.__constrained.clear()
+        # the bake cache survives a reset, since panels re-declare the same layout on every arrange()
+        self.__positions = {}
+        self.__constrained = {}
 
     def bake(self):
+        if self.__positions != self.__baked_positions:
+            self.__bakes.clear()
+            self.__baked_positions = dict(self.__positions)
+
+        constrained = self.__bakes.get(self.window_size)
+        if constrained is None:
+            constrained = self.__bake()
+            self.__bakes.put(self.window_size, constrained)
+
+        self.__constrained = constrained
+        for widget, region in constrained.items():
+            widget.set_size(vec2(region.h, region.w))
+
+    def __bake(self) -> dict[Widget, rect2]:
+        constrained = {}
         for widget, position in self.__positions.items():
             actual_y = min(position.y, self.window_size.y - 1)
             actual_x = min(position.x, self.window_size.x - 1)
@@ -35,8 +56,11 @@ class FixedLayout(Layout):
             region = rect2(
                 actual_y, actual_x, actual_end_y - actual_y + 1, actual_end_x - actual_x + 1
             )
-            self.__constrained[widget] = region
-            widget.set_size(vec2(region.h, region.w))
+            constrained[widget] = region
+        return constrained
+
+    def region(self, widget: Widget) -> rect2 | None:
+        return self.__constrained.get(widget)
 
     def carve(self, widget: Widget, window: curses.window) -> curses.window | None:
         entry = self.__constrained.get(widget)
@@ -1,13 +1,14 @@
 import curses
 from dataclasses import dataclass
 
-from .layout import Layout, LayoutError
+from .layout import Layout, LayoutError, BAKE_CACHE_SIZE
+from .._cache import LRUCache
 from ..struct import rect2, vec2
 from ..widgets import Widget
 from .. import _log
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class GridInfo:
     widget: Widget
     row_span: int
@@ -18,11 +19,15 @@ class GridLayout(Layout):
     __cells: dict[vec2, GridInfo]
     __widgets: set[Widget]  # used to avoid iterating over cells to check for duplicates
     __regions: dict[Widget, rect2]
+    __bakes: LRUCache[vec2, dict[Widget, rect2]]  # bakes of __baked_cells, by window size
+    __baked_cells: dict[vec2, GridInfo]
 
     def __init__(self):
         self.__cells = {}
         self.__widgets = set()
         self.__regions = {}
+        self.__bakes = LRUCache(BAKE_CACHE_SIZE)
+        self.__baked_cells = {}
 
     def add(self, widget: Widget, row: int, col: int, row_span: int = 1, col_span: int = 1):
         if row_span < 1:
@@ -36,26 +41,44 @@ class GridLayout(Layout):
         self.__widgets.add(widget)
 
     def reset(self):
-        self.__cells.clear()
-        self.__widgets.clear()
-        self.__regions.clear()
+        # the bake cache survives a reset, since panels re-declare the same layout on every arrange()
+        self.__cells = {}
+        self.__widgets = set()
+        self.__regions = {}
 
     def bake(self):
         if not self.__cells:
             return
 
+        if self.__cells != self.__baked_cells:
+            self.__bakes.clear()
+            self.__baked_cells = dict(self.__cells)
+
+        regions = self.__bakes.get(self.window_size)
+        if regions is None:
+            regions = self.__bake()
+            self.__bakes.put(self.window_size, regions)
+
+        self.__regions = regions
+        for widget, region in regions.items():
+            widget.set_size(vec2(region.h, region.w))
+
+    def __bake(self) -> dict[Widget, rect2]:
         max_row = max(pos.y + info.row_span - 1 for pos, info in self.__cells.items())
         max_col = max(pos.x + info.col_span - 1 for pos, info in self.__cells.items())
         num_rows = max_row + 1
         num_cols = max_col + 1
+        regions = {}
         for pos, info in self.__cells.items():
             row_height = (self.window_size.y * info.row_span) // num_rows
             col_width  = (self.window_size.x * info.col_span) // num_cols
             if row_height == 0 or col_width == 0:
                 continue
-            region = rect2(y=pos.y * row_height, x=pos.x * col_width, h=row_height, w=col_width)
-            self.__regions[info.widget] = region
-            info.widget.set_size(vec2(region.h, region.w))
+            regions[info.widget] = rect2(y=pos.y * row_height, x=pos.x * col_width, h=row_height, w=col_width)
+        return regions
+
+    def region(self, widget: Widget) -> rect2 | None:
+        return self.__regions.get(widget)
 
     def carve(self, widget: Widget, window: curses.window) -> curses.window | None:
         entry = self.__regions.get(widget)
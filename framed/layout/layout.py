@@ -1,10 +1,14 @@
 from abc import ABCMeta, abstractmethod
 import curses
 
-from ..struct import vec2
+from ..struct import rect2, vec2
 from ..widgets import Widget
 
 
+# the number of window sizes for which a layout keeps its baked regions
+BAKE_CACHE_SIZE = 8
+
+
 class LayoutError(Exception):
     pass
 
@@ -45,3 +49,34 @@ class Layout(metaclass=ABCMeta):
         """
         raise NotImplementedError()
 
+    def recarve(self, widget: Widget, window: curses.window, subwindow: curses.window) -> curses.window | None:
+        """
+        Like carve(), but given the subwindow that the widget was
+        carved by an earlier bake. The subwindow is returned as-is if
+        its region has not changed, and moved or resized in place if
+        possible, so that a new subwindow is only allocated when it
+        cannot be reused.
+        """
+        region = self.region(widget)
+        if region is None:
+            return None
+
+        # compare against the subwindow itself, since resizing the window may have clipped it
+        size = subwindow.getmaxyx()
+        position = subwindow.getparyx()
+        try:
+            if size != (region.h, region.w):
+                subwindow.resize(region.h, region.w)
+            if position != (region.y, region.x):
+                subwindow.mvderwin(region.y, region.x)
+        except curses.error:
+            return self.carve(widget, window)
+        return subwindow
+
+    def region(self, widget: Widget) -> rect2 | None:
+        """
+        Returns the region, relative to the panel, that bake()
+        allotted to the specified widget, or None if the widget
+        was not allotted any space.
+        """
+        return None
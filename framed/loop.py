@@ -0,0 +1,299 @@
+from __future__ import annotations
+import collections
+from dataclasses import dataclass
+import heapq
+import itertools
+import os
+import time
+import typing
+
+
+class Timer:
+    """
+    A handle to a callback scheduled on an App's event loop. A
+    Timer fires once at its deadline, or repeatedly every
+    `interval` seconds if one was given. Calling cancel() prevents
+    any further invocations.
+    """
+
+    __slots__ = ("deadline", "interval", "callback", "cancelled")
+
+    deadline: float
+    interval: float | None
+    callback: typing.Callable[[], typing.Any]
+    cancelled: bool
+
+    def __init__(self, deadline: float, callback: typing.Callable[[], typing.Any], interval: float | None = None):
+        self.deadline = deadline
+        self.interval = interval
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerQueue:
+    """
+    A heap of pending Timers ordered by deadline. Cancelled timers
+    are discarded lazily as they reach the front of the queue.
+    """
+
+    __heap: list[tuple[float, int, Timer]]
+    __counter: typing.Iterator[int]
+
+    def __init__(self):
+        self.__heap = []
+        self.__counter = itertools.count()
+
+    def schedule(self, delay: float, callback: typing.Callable[[], typing.Any], interval: float | None = None) -> Timer:
+        timer = Timer(time.monotonic() + delay, callback, interval)
+        self.push(timer)
+        return timer
+
+    def push(self, timer: Timer):
+        heapq.heappush(self.__heap, (timer.deadline, next(self.__counter), timer))
+
+    def next_deadline(self) -> float | None:
+        heap = self.__heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now: float) -> list[tuple[float, Timer]]:
+        """
+        Removes and returns all timers whose deadline has passed,
+        along with the deadline each one was due at. Repeating
+        timers are re-armed before being returned.
+        """
+        due = []
+        heap = self.__heap
+        while heap and heap[0][0] <= now:
+            deadline, _, timer = heapq.heappop(heap)
+            if timer.cancelled:
+                continue
+            due.append((deadline, timer))
+
+        for _, timer in due:
+            if timer.interval is not None:
+                # re-arm relative to the missed deadline, but never schedule into the past
+                timer.deadline = max(timer.deadline + timer.interval, now)
+                self.push(timer)
+        return due
+
+    def __len__(self) -> int:
+        return len(self.__heap)
+
+
+class Waker:
+    """
+    A self-pipe used to interrupt a blocking wait on the event loop
+    from another thread or a signal handler. Repeated calls to
+    wake() between drains only write a single byte.
+    """
+
+    __read_fd: int
+    __write_fd: int
+    __armed: bool
+    __woken_at: float
+
+    def __init__(self):
+        self.__read_fd, self.__write_fd = os.pipe()
+        os.set_blocking(self.__read_fd, False)
+        os.set_blocking(self.__write_fd, False)
+        self.__armed = False
+        self.__woken_at = 0.0
+
+    def fileno(self) -> int:
+        return self.__read_fd
+
+    @property
+    def closed(self) -> bool:
+        return self.__write_fd < 0
+
+    def wake(self):
+        if self.__armed or self.__write_fd < 0:
+            return
+
+        self.__armed = True
+        self.__woken_at = time.monotonic()
+        try:
+            os.write(self.__write_fd, b"\0")
+        except (BlockingIOError, OSError):
+            # the pipe is already full (or closed), so the loop will wake up regardless
+            pass
+
+    def drain(self) -> float:
+        """
+        Empties the pipe, returning the time at which the first
+        wakeup since the previous drain was requested.
+        """
+        try:
+            while os.read(self.__read_fd, 4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        # only disarm once the pipe is empty: a wake() that wrote after the read above
+        # leaves its byte in the pipe, rather than being consumed while still armed
+        self.__armed = False
+        return self.__woken_at
+
+    def close(self):
+        if self.__write_fd < 0:
+            return
+        read_fd, write_fd = self.__read_fd, self.__write_fd
+        # later calls to wake() must not write to a descriptor that has been reused
+        self.__read_fd = self.__write_fd = -1
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+_UNKEYED = object()
+
+
+class UpdateQueue:
+    """
+    A queue of callbacks posted from arbitrary threads, to be run
+    on the main loop. It relies only on the atomicity of deque and
+    dict operations, so producers never take a lock. Callbacks
+    posted with a key are coalesced: if several are posted with
+    the same key before the queue is drained, only the latest runs.
+    """
+
+    __queue: collections.deque[tuple[typing.Any, typing.Callable[..., typing.Any] | None, tuple]]
+    __latest: dict[typing.Hashable, tuple[typing.Callable[..., typing.Any], tuple]]
+
+    def __init__(self):
+        self.__queue = collections.deque()
+        self.__latest = {}
+
+    def put(self, callback: typing.Callable[..., typing.Any], args: tuple = (), key: typing.Hashable | None = None):
+        if key is None:
+            self.__queue.append((_UNKEYED, callback, args))
+        else:
+            # the value must be stored before the key is queued, so that a consumer
+            # which pops the key is guaranteed to observe the latest value
+            self.__latest[key] = (callback, args)
+            self.__queue.append((key, None, ()))
+
+    def drain(self) -> int:
+        """
+        Runs the callbacks that were queued when the drain began,
+        returning the number that were actually invoked. Callbacks
+        queued while draining are left for the next drain.
+        """
+        queue = self.__queue
+        latest = self.__latest
+        invoked = 0
+        for _ in range(len(queue)):
+            key, callback, args = queue.popleft()
+            if callback is None:
+                # a keyed entry, which runs the latest callback posted for its key
+                entry = latest.pop(key, None)
+                if entry is None:
+                    # an earlier entry for this key already ran the latest value
+                    continue
+                callback, args = entry
+
+            callback(*args)
+            invoked += 1
+        return invoked
+
+    def __len__(self) -> int:
+        return len(self.__queue)
+
+
+class FrameScheduler:
+    """
+    Paces rendering so that at most one frame is drawn per frame
+    interval, merging every invalidation in between into a single
+    render pass. The interval starts at 1 / max_fps, but if drawing
+    and writing a frame takes longer than that budget (for instance,
+    over a slow link) the interval is stretched so that rendering
+    never occupies more than half of the loop's time, leaving the
+    rest for input. It recovers as frames become cheap again.
+    """
+
+    MAX_INTERVAL = 0.5
+    SMOOTHING = 0.25
+
+    __min_interval: float
+    __interval: float
+    __last_frame: float
+    __cost: float  # moving average of the time spent on a frame
+
+    def __init__(self, max_fps: float | None = 60.0):
+        self.__last_frame = float("-inf")
+        self.__cost = 0.0
+        self.set_max_fps(max_fps)
+
+    def set_max_fps(self, max_fps: float | None):
+        if max_fps is not None and max_fps <= 0:
+            raise ValueError("max_fps must be greater than 0!")
+        self.__min_interval = 0.0 if max_fps is None else 1.0 / max_fps
+        self.__interval = max(self.__min_interval, min(self.MAX_INTERVAL, self.__cost * 2))
+
+    def next_frame(self) -> float:
+        return self.__last_frame + self.__interval
+
+    def record(self, start: float, duration: float):
+        self.__last_frame = start
+        self.__cost += (duration - self.__cost) * self.SMOOTHING
+        self.__interval = max(self.__min_interval, min(self.MAX_INTERVAL, self.__cost * 2))
+
+    @property
+    def interval(self) -> float:
+        return self.__interval
+
+    @property
+    def cost(self) -> float:
+        return self.__cost
+
+
+@dataclass
+class LoopStats:
+    """
+    Counters describing the behaviour of an App's event loop.
+    Latencies are measured in seconds, from the moment a timer
+    became due or a wakeup was requested to the moment the loop
+    got around to handling it.
+    """
+
+    wakeups: int = 0
+    input_wakeups: int = 0
+    keys_read: int = 0
+    timer_wakeups: int = 0
+    external_wakeups: int = 0
+    updates_run: int = 0
+    updates_coalesced: int = 0
+
+    frames: int = 0
+    frame_time_last: float = 0.0
+    frame_time_max: float = 0.0
+    widgets_rendered: int = 0
+    widgets_skipped: int = 0
+
+    latency_last: float = 0.0
+    latency_max: float = 0.0
+    latency_total: float = 0.0
+    latency_samples: int = 0
+
+    def record_latency(self, latency: float):
+        self.latency_last = latency
+        self.latency_total += latency
+        self.latency_samples += 1
+        if latency > self.latency_max:
+            self.latency_max = latency
+
+    @property
+    def latency_mean(self) -> float:
+        if self.latency_samples == 0:
+            return 0.0
+        return self.latency_total / self.latency_samples
+
+    def reset(self):
+        for name, value in LoopStats().__dict__.items():
+            setattr(self, name, value)
+
+
+__all__ = ["FrameScheduler", "LoopStats", "Timer", "TimerQueue", "UpdateQueue", "Waker"]
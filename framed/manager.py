@@ -1,13 +1,20 @@
 from abc import ABCMeta, abstractmethod
+import contextlib
 import curses
 from dataclasses import dataclass
 import enum
 import math
+import typing
 
+from ._cache import LRUCache
+from ._encoding import unicode_supported
+from ._spatial import _GridIndex
+from .backend import Backend
+from .backend.backend import as_backend
 from .panel import Panel
 from .struct import vec2, rect2
-from ._tree import _node, _tree, TreeError
-from . import _log
+from ._tree import _node, _traverse, _tree, TreeError
+from . import _log, instrument
 
 
 class ManagerError(Exception):
@@ -33,9 +40,33 @@ class Manager(metaclass=ABCMeta):
     """
 
     _stdscr: curses.window
-
-    def __init__(self, stdscr: curses.window):
-        self._stdscr = stdscr
+    __backend: Backend
+    __fully_damaged: bool
+    __decorations_damaged: bool
+    __damaged: dict[Panel, None]  # insertion-ordered set of panels with pending damage
+    __batch_depth: int
+    __refresh_pending: bool
+    __refresh_handler: typing.Callable[[], typing.Any] | None
+
+    # the number of widgets which were drawn, and left untouched, by the last refresh()
+    widgets_rendered: int
+    widgets_skipped: int
+
+    def __init__(self, stdscr: curses.window | Backend):
+        self.__backend = as_backend(stdscr)
+        self._stdscr = self.__backend.stdscr
+        self.__fully_damaged = True
+        self.__decorations_damaged = False
+        self.__damaged = {}
+        self.__batch_depth = 0
+        self.__refresh_pending = False
+        self.__refresh_handler = None
+        self.widgets_rendered = 0
+        self.widgets_skipped = 0
+
+    @property
+    def backend(self) -> Backend:
+        return self.__backend
 
     @abstractmethod
     def add_panel(self, panel: Panel, *args, **kwargs):
@@ -62,13 +93,163 @@ class Manager(metaclass=ABCMeta):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def visible_panels(self) -> list[Panel]:
+        """
+        Returns the panels that are currently visible on the
+        screen.
+        """
+        raise NotImplementedError()
+
+    def panel_at(self, position: vec2) -> Panel | None:
+        """
+        Returns the visible panel covering a position of the screen.
+        """
+        for panel in reversed(self.visible_panels()):
+            if panel.region.contains(position):
+                return panel
+        return None
+
+    def damage(self, region: rect2 | None = None):
+        """
+        Marks a region of the screen as needing to be redrawn on
+        the next call to refresh(). If no region is specified, the
+        whole screen is cleared and repainted, which is necessary
+        after the panels have been re-arranged.
+        """
+        if region is None:
+            self.__fully_damaged = True
+            return
+
+        for panel in self.visible_panels():
+            panel_region = panel.region
+            if panel_region.intersects(region):
+                panel.damage(region.intersection(panel_region).translate(-panel.position))
+
+    def damage_decorations(self):
+        """
+        Marks the decorations as needing to be redrawn on the next
+        call to refresh(), without clearing the screen. This is
+        sufficient when panels have moved but the set of visible
+        panels is unchanged.
+        """
+        self.__decorations_damaged = True
+
+    def _damage_panel(self, panel: Panel):
+        self.__damaged[panel] = None
+
+    def _count_widgets(self, rendered: int, skipped: int):
+        self.widgets_rendered += rendered
+        self.widgets_skipped += skipped
+
+    @contextlib.contextmanager
+    def batch(self, flush: bool = True):
+        """
+        Defers calls to refresh() until the outermost batch exits,
+        at which point all the accumulated damage is rendered and
+        flushed to the terminal with a single doupdate(). If flush
+        is False, the refresh is left pending for the caller to
+        perform later (see refresh_pending).
+        """
+        self.__batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.__batch_depth -= 1
+            if flush and self.__batch_depth == 0 and self.__refresh_pending:
+                self.refresh()
+
+    @property
+    def batching(self) -> bool:
+        return self.__batch_depth > 0
+
+    @property
+    def refresh_pending(self) -> bool:
+        return self.__refresh_pending
+
+    def set_refresh_handler(self, handler: typing.Callable[[], typing.Any] | None):
+        """
+        Sets a function to be called when a refresh is deferred by
+        a batch, once per refresh that becomes pending.
+        """
+        self.__refresh_handler = handler
+
     def refresh(self):
+        if self.__batch_depth > 0:
+            if not self.__refresh_pending:
+                self.__refresh_pending = True
+                if self.__refresh_handler is not None:
+                    self.__refresh_handler()
+            return
+
+        self.flush()
+
+    def flush(self):
+        """
+        Renders all the accumulated damage and flushes it to the
+        terminal immediately, even inside a batch.
+        """
+        self.__refresh_pending = False
+        self.widgets_rendered = self.widgets_skipped = 0
+        if self.__fully_damaged:
+            self.__repaint()
+        else:
+            self.__repair()
+        self.__backend.doupdate()
+
+        instrumentation = instrument.active
+        if instrumentation is not None:
+            instrumentation.count("widgets_rendered", self.widgets_rendered)
+            instrumentation.count("widgets_skipped", self.widgets_skipped)
+            instrumentation.end_frame()
+
+    def __repaint(self):
+        instrumentation = instrument.active
         self._stdscr.clear()
+        start = instrumentation.clock() if instrumentation is not None else 0.0
         self.decorate()
+        if instrumentation is not None:
+            instrumentation.record("decorate", start)
         self._stdscr.noutrefresh()
+        for panel in self.visible_panels():
+            panel.damage()
+        start = instrumentation.clock() if instrumentation is not None else 0.0
         self.show()
+        if instrumentation is not None:
+            instrumentation.record("show", start)
         self._stdscr.noutrefresh()
-        curses.doupdate()
+        self.__fully_damaged = False
+        self.__decorations_damaged = False
+        self.__damaged.clear()
+
+    def __repair(self):
+        damaged, self.__damaged = self.__damaged, {}
+        if self.__decorations_damaged:
+            self.__decorations_damaged = False
+            instrumentation = instrument.active
+            start = instrumentation.clock() if instrumentation is not None else 0.0
+            self.decorate()
+            if instrumentation is not None:
+                instrumentation.record("decorate", start)
+            self._stdscr.noutrefresh()
+            # stdscr may have been copied over parts of the panels, so every panel must be
+            # copied to the screen again, although only the damaged ones are re-rendered
+            for panel in self.visible_panels():
+                if panel not in damaged:
+                    panel.present()
+
+        for panel in damaged:
+            if self.request_update(panel):
+                panel.render()
+            elif self._keeps_offscreen(panel):
+                panel.render(present=False)
+
+    def _keeps_offscreen(self, panel: Panel) -> bool:
+        """
+        Determines whether a panel which is not visible should still
+        be kept up to date, by rendering it without presenting it.
+        """
+        return False
 
     @abstractmethod
     def decorate(self):
@@ -92,15 +273,32 @@ class Manager(metaclass=ABCMeta):
 
 
 class StackManager(Manager):
+    """
+    Shows one panel at a time, each covering the whole screen.
+    Since every panel owns a full-screen window, the most recently
+    shown panels are kept rendered offscreen while hidden, so that
+    switching back to one of them only needs its window to be
+    copied to the screen. MAX_CACHED_CELLS limits the total size
+    of the hidden windows which are kept up to date; the least
+    recently shown panels beyond that are released, and rendered
+    from scratch when they are next shown.
+    """
+
+    MAX_CACHED_CELLS = 1 << 20
+
     __panels: list[Panel]
     __active: int
     __showing: bool
+    __cached: dict[Panel, None]  # hidden panels rendered offscreen, least recently shown first
+    __max_cached_cells: int
 
-    def __init__(self, stdscr: curses.window):
+    def __init__(self, stdscr: curses.window | Backend, max_cached_cells: int | None = None):
         super().__init__(stdscr)
         self.__panels = []
         self.__active = -1
         self.__showing = False
+        self.__cached = {}
+        self.__max_cached_cells = self.MAX_CACHED_CELLS if max_cached_cells is None else max_cached_cells
 
     # --- Manager method implementations ---
     def add_panel(self, panel: Panel):
@@ -112,6 +310,7 @@ class StackManager(Manager):
     def arrange(self, size: vec2):
         for panel in self.__panels:
             panel.set_size(size)
+        self.damage()
 
     def show(self):
         self.__showing = True
@@ -127,48 +326,127 @@ class StackManager(Manager):
     def decorate(self):
         pass
 
+    def visible_panels(self) -> list[Panel]:
+        if self.__active == -1:
+            return []
+
+        return [self.__panels[self.__active]]
+
     def request_update(self, panel: Panel) -> bool:
         if self.__active == -1:
             return False
 
         return panel == self.__panels[self.__active]
 
+    def _keeps_offscreen(self, panel: Panel) -> bool:
+        return panel in self.__cached
+
     # --- StackManager-specific methods ---
     def set_active_panel(self, active_index: int):
         if active_index >= len(self.__panels):
             raise ManagerError("active_index must be a valid index!")
+
+        previous = self.__active
         self.__active = active_index
+        panel = self.__panels[active_index]
+        self.__cached.pop(panel, None)
+        if previous != -1 and previous != active_index:
+            self.__cache(self.__panels[previous])
+
         if self.__showing:
-            self.__display()
+            # every panel covers the whole screen, so there is no need to clear it
+            if panel.damaged:
+                self._damage_panel(panel)
+            else:
+                panel.present()
             self.refresh()
 
+    def __cache(self, panel: Panel):
+        self.__cached[panel] = None
+        cells = sum(cached.size.y * cached.size.x for cached in self.__cached)
+        while cells > self.__max_cached_cells:
+            evicted = next(iter(self.__cached))
+            del self.__cached[evicted]
+            cells -= evicted.size.y * evicted.size.x
+            evicted.release()
+
 
 class Direction(enum.IntEnum):
     horizontal = 0
     vertical = 1
 
 
-@dataclass
+@dataclass(slots=True)
 class Split:
     portion: float
     panel_index: int
     region: rect2
     direction: Direction
+    dirty: bool = False  # the children of this split must be re-arranged
+    dirty_below: bool = False  # some split below this one is dirty
+
+
+# directions in which a border cell connects to its neighbours
+_UP, _DOWN, _LEFT, _RIGHT = 1, 2, 4, 8
+
+_UNICODE_BORDERS = {
+    _UP: "\u2502", _DOWN: "\u2502", _UP | _DOWN: "\u2502",
+    _LEFT: "\u2500", _RIGHT: "\u2500", _LEFT | _RIGHT: "\u2500",
+    _DOWN | _RIGHT: "\u250c", _DOWN | _LEFT: "\u2510", _UP | _RIGHT: "\u2514", _UP | _LEFT: "\u2518",
+    _UP | _DOWN | _RIGHT: "\u251c", _UP | _DOWN | _LEFT: "\u2524",
+    _LEFT | _RIGHT | _DOWN: "\u252c", _LEFT | _RIGHT | _UP: "\u2534",
+    _UP | _DOWN | _LEFT | _RIGHT: "\u253c",
+}
+
+_ASCII_BORDERS = {
+    mask: "|" if mask & (_LEFT | _RIGHT) == 0 else "-" if mask & (_UP | _DOWN) == 0 else "+"
+    for mask in _UNICODE_BORDERS
+}
+
+
+# the regions assigned to each split, and to each visible panel, for a screen size
+_Arrangement = tuple[list[tuple[Split, rect2]], list[tuple[Panel, rect2]]]
 
 
 class MultiplexManager(Manager):
+    ARRANGEMENT_CACHE_SIZE = 8
+
     __splits: _tree[Split]  # scalars representing the portion of the screen which a split occupies
     __panels: list[Panel]
-    __visible: list[Panel]
-
-    def __init__(self, stdscr: curses.window, top_level_split_direction: Direction = Direction.horizontal):
+    __visible: dict[Panel, None]
+    __arrangements: LRUCache[vec2, _Arrangement]
+    __size: vec2 | None  # the size of the last arrangement
+    __borders: LRUCache[vec2, list[tuple[int, int, str]]]  # runs of border glyphs, by row
+    __glyphs: dict[int, str]
+    __hit_index: _GridIndex[Panel] | None  # built from the visible panels' regions when first needed
+    __stale_screen: bool  # whether stdscr still shows borders (or panels) from before a re-arrangement
+
+    def __init__(
+        self,
+        stdscr: curses.window | Backend,
+        top_level_split_direction: Direction = Direction.horizontal,
+        ascii_borders: bool | None = None,
+    ):
+        """
+        If ascii_borders is None, borders are drawn with box-drawing
+        characters only if the locale's encoding can represent them.
+        """
         super().__init__(stdscr)
         self.__splits = _tree(Split(1.0, -1, rect2(0, 0, 0, 0), top_level_split_direction))
         self.__panels = []
-        self.__visible = []
+        self.__visible = {}
+        self.__arrangements = LRUCache(self.ARRANGEMENT_CACHE_SIZE)
+        self.__size = None
+        self.__borders = LRUCache(self.ARRANGEMENT_CACHE_SIZE)
+        if ascii_borders is None:
+            ascii_borders = not unicode_supported()
+        self.__glyphs = _ASCII_BORDERS if ascii_borders else _UNICODE_BORDERS
+        self.__hit_index = None
+        self.__stale_screen = False
 
     # --- Manager method implementations ---
     def add_panel(self, panel: Panel, split_path: tuple[int, ...]):
+        self.__tree_changed()
         self.__panels.append(panel)
         try:
             split = self.__splits.get_node(split_path)
@@ -177,13 +455,104 @@ class MultiplexManager(Manager):
             split.value.panel_index = len(self.__panels) - 1
         except TreeError:
             raise ManagerError("No split with path '%s'" % str(split_path))
+        # panels are placed by the split containing their own
+        self.__mark_dirty(split_path[:-1])
 
     def arrange(self, size: vec2):
-        base_region = rect2(0, 0, size.y, size.x)
+        """
+        Assigns a region of the screen to every panel. If the size
+        has not changed since the last arrangement, only the splits
+        which have been modified since then (and the panels below
+        them) are re-arranged.
+        """
+        if size != self.__size:
+            self.__arrange_all(size)
+            return
+
+        root = self.__splits.root
+        if not (root.value.dirty or root.value.dirty_below):
+            return
+
+        removed: list[Panel] = []
+        placed: list[Panel] = []
+        self.__rearrange(root, removed, placed)
+
+        lost = set(removed).difference(placed)
+        if lost:
+            # the area under the panels which are no longer visible must be cleared
+            self.damage()
+        else:
+            # borders may have moved, or left cells which no panel covers any more; redrawing
+            # stdscr from blank clears them, and the panels are then presented over it again
+            self.__stale_screen = True
+            self.damage_decorations()
+            for panel in set(placed).difference(removed):
+                panel.damage()
+
+    def __arrange_all(self, size: vec2):
+        arrangement = self.__arrangements.get(size)
+        if arrangement is None:
+            arrangement = ([], [])
+            root = self.__splits.root
+            region = rect2(0, 0, size.y, size.x)
+            arrangement[0].append((root.value, region))
+            self.__arrange_split(root, region, arrangement)
+            self.__arrangements.put(size, arrangement)
+
+        self.__size = size
         self.__visible.clear()
-        self.__arrange_split(self.__splits.root, base_region)
+        self.__apply(arrangement)
+        for _, _, split in self.__splits:
+            split.dirty = split.dirty_below = False
+        self.damage()
 
-    def __arrange_split(self, split_node: _node[Split], region: rect2):
+    def __rearrange(self, split_node: _node[Split], removed: list[Panel], placed: list[Panel]):
+        split = split_node.value
+        if split.dirty:
+            for panel in self.__subtree_panels(split_node):
+                if panel in self.__visible:
+                    del self.__visible[panel]
+                    removed.append(panel)
+
+            arrangement = ([], [])
+            self.__arrange_split(split_node, split.region, arrangement)
+            self.__apply(arrangement)
+            placed.extend(panel for panel, _ in arrangement[1])
+
+            for _, _, descendant in _traverse(split_node):
+                descendant.dirty = descendant.dirty_below = False
+        elif split.dirty_below:
+            split.dirty_below = False
+            for child_node in split_node.children:
+                self.__rearrange(child_node, removed, placed)
+
+    def __apply(self, arrangement: _Arrangement):
+        split_regions, panel_regions = arrangement
+        for split, region in split_regions:
+            split.region = region
+
+        for panel, region in panel_regions:
+            panel.set_region(region)
+            self.__visible[panel] = None
+        self.__hit_index = None
+
+    def __subtree_panels(self, split_node: _node[Split]) -> typing.Iterator[Panel]:
+        for _, _, split in _traverse(split_node):
+            if split.panel_index != -1:
+                yield self.__panels[split.panel_index]
+
+    def __tree_changed(self):
+        self.__arrangements.clear()
+        self.__borders.clear()
+
+    def __mark_dirty(self, path: tuple[int, ...]):
+        node = self.__splits.root
+        for index in path:
+            node.value.dirty_below = True
+            node = node.children[index]
+        node.value.dirty = True
+
+    def __arrange_split(self, split_node: _node[Split], region: rect2, arrangement: _Arrangement):
         split = split_node.value
         total_directional_space = region.w if split.direction == Direction.horizontal else region.h
         directional_space = total_directional_space - (len(split_node.children) - 1)
@@ -191,141 +560,126 @@ class MultiplexManager(Manager):
         if directional_space < len(split_node.children):
             # there's not enough space to fit the children. in this case, we will simply stop arranging
             # and not include the panels in the list of visible panels.
+            for _, _, descendant in _traverse(split_node):
+                if descendant is not split:
+                    arrangement[0].append((descendant, rect2()))
             return
 
-        used_space = 0
-        sizes = [0] * len(split_node.children)
-        for index, child in enumerate(split_node.children):
-            child_space = max(1, math.floor(directional_space * child.value.portion))
-            sizes[index] = child_space
-            used_space += child_space
+        children = split_node.children
+        sizes = [max(1, math.floor(directional_space * child.value.portion)) for child in children]
 
-        distribute_index = 0
-        while used_space < directional_space:
-            sizes[distribute_index] += 1
-            distribute_index = (distribute_index + 1) % len(sizes)
-            used_space += 1
+        # space left over after rounding is handed out one cell at a time, starting from the first child
+        extra = directional_space - sum(sizes)
+        if extra > 0:
+            share, remainder = divmod(extra, len(sizes))
+            for index in range(len(sizes)):
+                sizes[index] += share + (index < remainder)
 
-        consumed_space = 0
-        for index, child_node in enumerate(split_node.children):
+        horizontal = split.direction == Direction.horizontal
+        split_regions, panel_regions = arrangement
+        offset = region.x if horizontal else region.y
+        for child_node, size in zip(children, sizes):
             child = child_node.value
-            if split.direction == Direction.horizontal:
-                new_region = rect2(region.y, region.x + consumed_space, region.h, sizes[index])
+            if horizontal:
+                new_region = rect2(region.y, offset, region.h, size)
             else:
-                new_region = rect2(region.y + consumed_space, region.x, sizes[index], region.w)
+                new_region = rect2(offset, region.x, size, region.w)
 
-            child.region = new_region
+            split_regions.append((child, new_region))
             if child.panel_index != -1:
-                panel = self.__panels[child.panel_index]
-                panel.set_size(vec2(child.region.h, child.region.w))
-                panel.set_position(vec2(child.region.y, child.region.x))
-                self.__visible.append(panel)
+                panel_regions.append((self.__panels[child.panel_index], new_region))
+
+            offset += size + 1  # add one for border
 
-            consumed_space += sizes[index] + 1  # add one for border
-            
             if child_node.children:
-                self.__arrange_split(child_node, child.region)
+                self.__arrange_split(child_node, new_region, arrangement)
 
     def show(self):
         for panel in self.__visible:
             panel.render()
 
     def decorate(self):
-        root = self.__splits.root
-        self.__decorate(root)
+        borders = self.__borders.get(self.__size) if self.__size is not None else None
+        if borders is None:
+            borders = self.__compute_borders()
+            if self.__size is not None:
+                self.__borders.put(self.__size, borders)
+
+        if self.__stale_screen:
+            self.__stale_screen = False
+            self._stdscr.erase()
+        for y, x, run in borders:
+            self._stdscr.addstr(y, x, run)
+
+    def __compute_borders(self) -> list[tuple[int, int, str]]:
+        """
+        Computes the border glyphs for the current arrangement as
+        runs of consecutive cells on each row. Every border cell is
+        first given a bitmask of the directions in which it has a
+        neighbouring border, from which its glyph is looked up.
+        """
+        segments: list[tuple[rect2, Direction]] = []
+        self.__collect_borders(self.__splits.root, segments)
+
+        junctions: dict[tuple[int, int], int] = {}
+        for region, direction in segments:
+            if direction == Direction.horizontal:
+                for y in range(region.y, region.y + region.h):
+                    junctions[y, region.x] = junctions.get((y, region.x), 0) | _UP | _DOWN
+            else:
+                for x in range(region.x, region.x + region.w):
+                    junctions[region.y, x] = junctions.get((region.y, x), 0) | _LEFT | _RIGHT
 
-    def __decorate(self, split_node: _node[Split]):
+        # join the ends of each border to any border which they touch
+        for region, direction in segments:
+            if direction == Direction.horizontal:
+                ends = (((region.y - 1, region.x), _DOWN), ((region.y + region.h, region.x), _UP))
+            else:
+                ends = (((region.y, region.x - 1), _RIGHT), ((region.y, region.x + region.w), _LEFT))
+            for cell, bit in ends:
+                if cell in junctions:
+                    junctions[cell] |= bit
+
+        borders = []
+        run_y = run_x = -1
+        run: list[str] = []
+        for (y, x), mask in sorted(junctions.items()):
+            if y != run_y or x != run_x + len(run):
+                if run:
+                    borders.append((run_y, run_x, "".join(run)))
+                run_y, run_x, run = y, x, []
+            run.append(self.__glyphs[mask])
+        if run:
+            borders.append((run_y, run_x, "".join(run)))
+        return borders
+
+    def __collect_borders(self, split_node: _node[Split], segments: list[tuple[rect2, Direction]]):
+        # each border is paired with the direction of the split it divides, so a
+        # horizontal split is divided by vertical borders and vice versa
         split = split_node.value
         for index, child_node in enumerate(split_node.children):
-            child = child_node.value
+            region = child_node.value.region
+            if region.empty:
+                continue
             if index > 0:
-                # draw border
                 if split.direction == Direction.horizontal:
-                    for y in range(child.region.h):
-                        self._stdscr.move(child.region.y + y, child.region.x - 1)
-                        self._stdscr.addch("\u2502")
+                    segments.append((rect2(region.y, region.x - 1, region.h, 1), split.direction))
                 else:
-                    self._stdscr.move(child.region.y - 1, child.region.x)
-                    self._stdscr.addnstr("\u2500" * child.region.w, child.region.w)
-
-        self._stdscr.noutrefresh()
+                    segments.append((rect2(region.y - 1, region.x, 1, region.w), split.direction))
+            self.__collect_borders(child_node, segments)
 
-        for child_node in split_node.children:
-            child = child_node.value
-            self.__decorate(child_node)
-            self.__connect_borders(child.region, split.direction)
-
-    def __connect_borders(self, region: rect2, parent_direction: Direction):
-        # TODO: Support non-unicode systems
-        max_y, max_x = self._stdscr.getmaxyx()
-        if parent_direction == Direction.horizontal:
-            y, x = region.y - 1, region.x - 1
-            if y >= 0:
-                existing_raw = self._stdscr.inch(y, x)
-                if existing_raw != 0xffffffff:
-                    existing = existing_raw & 0xffff
-                    if existing == 0x2534:
-                        updated = 0x253C
-                    elif existing == 0x2500:
-                        updated = 0x252C
-                    else:
-                        updated = -1
-
-                    if updated != -1:
-                        self._stdscr.move(y, x)
-                        self._stdscr.addch(chr(updated))
-
-            y = region.y + region.h  # 1 below the bottom
-            if y < max_y:
-                existing_raw = self._stdscr.inch(y, x)
-                if existing_raw != 0xffffffff:
-                    existing = existing_raw & 0xffff
-                    if existing == 0x252C:
-                        updated = 0x253C
-                    elif existing == 0x2500:
-                        updated = 0x2534
-                    else:
-                        updated = -1
-
-                    if updated != -1:
-                        self._stdscr.move(y, x)
-                        self._stdscr.addch(chr(updated))
-        else:
-            y, x = region.y - 1, region.x - 1
-            if x >= 0:
-                existing_raw = self._stdscr.inch(y, x)
-                if existing_raw != 0xffffffff:
-                    existing = existing_raw & 0xffff
-                    if existing == 0x2524:
-                        updated = 0x253C
-                    elif existing == 0x2502:
-                        updated = 0x251C
-                    else:
-                        updated = -1
-
-                    if updated != -1:
-                        self._stdscr.move(y, x)
-                        self._stdscr.addch(chr(updated))
-
-            x = region.x + region.w
-            if x < max_x:
-                existing_raw = self._stdscr.inch(y, x)
-                if existing_raw != 0xffffffff:
-                    existing = existing_raw & 0xffff
-                    if existing == 0x251C:
-                        updated = 0x253C
-                    elif existing == 0x2502:
-                        updated = 0x2524
-                    else:
-                        updated = -1
-
-                    if updated != -1:
-                        self._stdscr.move(y, x)
-                        self._stdscr.addch(chr(updated))
+    def visible_panels(self) -> list[Panel]:
+        return list(self.__visible)
 
     def request_update(self, panel: Panel) -> bool:
         return panel in self.__visible
 
+    def panel_at(self, position: vec2) -> Panel | None:
+        if self.__hit_index is None:
+            self.__hit_index = _GridIndex((panel.region, panel) for panel in self.__visible)
+        hit = self.__hit_index.at(position)
+        return None if hit is None else hit[1]
+
     # --- MultiplexManager-specific methods ---
     def split(self, parts: int, path: tuple[int, ...] | None = None, direction: Direction = Direction.horizontal) -> list[tuple[int, ...]]:
         if path is None:
@@ -334,6 +688,8 @@ class MultiplexManager(Manager):
         node = self.__splits.get_node(path)
         if node.children:
             raise ManagerError("'%s' is not a bottom-level split!" % str(path))
+        self.__tree_changed()
+        self.__mark_dirty(path)
         node.value.direction = direction
         portion = 1.0 / parts
         splits = []
@@ -341,3 +697,32 @@ class MultiplexManager(Manager):
             splits.append(self.__splits.insert(path, Split(portion, -1, rect2(), direction)))
         return splits
 
+
+    def set_portion(self, path: tuple[int, ...], portion: float):
+        """
+        Changes the portion of its parent split which the split at
+        `path` occupies. Only the parent split is re-arranged on the
+        next call to arrange(). The portions of a split's children
+        may not add up to more than 1, so to enlarge one child,
+        shrink its siblings first.
+        """
+        if not path:
+            raise ManagerError("The top-level split has no portion!")
+        if not 0 < portion <= 1:
+            raise ManagerError("portion must be in the range (0, 1]!")
+        try:
+            node = self.__splits.get_node(path)
+            parent = self.__splits.get_node(path[:-1])
+        except TreeError:
+            raise ManagerError("No split with path '%s'" % str(path))
+
+        split = node.value
+        total = sum(child.value.portion for child in parent.children if child is not node) + portion
+        # a little slack, for portions such as thirds which do not add up to exactly 1
+        if total > 1 + 1e-9:
+            raise ManagerError("The portions of the splits in '%s' would add up to more than 1!" % str(path[:-1]))
+
+        if split.portion != portion:
+            split.portion = portion
+            self.__tree_changed()
+            self.__mark_dirty(path[:-1])
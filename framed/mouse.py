@@ -0,0 +1,59 @@
+from __future__ import annotations
+import curses
+from dataclasses import dataclass
+
+from .struct import vec2
+
+
+# the buttons whose state a mouse event may report, numbered as in curses
+_BUTTONS = (1, 2, 3, 4, 5)
+
+_PRESSED = {button: getattr(curses, "BUTTON%d_PRESSED" % button, 0) for button in _BUTTONS}
+_RELEASED = {button: getattr(curses, "BUTTON%d_RELEASED" % button, 0) for button in _BUTTONS}
+_CLICKED = {
+    button: getattr(curses, "BUTTON%d_CLICKED" % button, 0)
+    | getattr(curses, "BUTTON%d_DOUBLE_CLICKED" % button, 0)
+    | getattr(curses, "BUTTON%d_TRIPLE_CLICKED" % button, 0)
+    for button in _BUTTONS
+}
+_ANY_PRESSED = sum(_PRESSED.values())
+_ANY_RELEASED = sum(_RELEASED.values()) | sum(_CLICKED.values())
+
+
+@dataclass(slots=True)
+class MouseEvent:
+    """
+    A mouse event, as reported by curses.getmouse(). position is
+    relative to the screen, and local to whatever the event is
+    being delivered to: a widget, a panel, or (for the App's mouse
+    handler) the screen.
+    """
+
+    position: vec2
+    buttons: int  # the curses button state, a combination of the BUTTON* and REPORT_MOUSE_POSITION bits
+    local: vec2 = vec2()
+
+    def pressed(self, button: int = 1) -> bool:
+        return bool(self.buttons & _PRESSED[button])
+
+    def released(self, button: int = 1) -> bool:
+        return bool(self.buttons & _RELEASED[button])
+
+    def clicked(self, button: int = 1) -> bool:
+        return bool(self.buttons & _CLICKED[button])
+
+    @property
+    def moved(self) -> bool:
+        """
+        Whether the event reports the mouse moving, rather than a
+        change in the state of its buttons.
+        """
+        return bool(self.buttons & curses.REPORT_MOUSE_POSITION)
+
+    @property
+    def starts_drag(self) -> bool:
+        return bool(self.buttons & _ANY_PRESSED)
+
+    @property
+    def ends_drag(self) -> bool:
+        return bool(self.buttons & _ANY_RELEASED)
@@ -0,0 +1,30 @@
+from .instrument import Instrumentation
+from .manager import Manager
+from .panel import Panel
+from .struct import rect2
+from .widgets import StatsView
+
+
+class StatsPanel(Panel):
+    """
+    A panel filled by a StatsView, which can be added to a manager
+    alongside an application's own panels to show where its frame
+    time goes. Its statistics are refreshed by sample(), which is
+    best called from a timer:
+
+        panel = app.new_panel(StatsPanel, ...)
+        app.call_every(0.5, panel.sample)
+    """
+
+    view: StatsView
+
+    def __init__(self, region: rect2, owner: Manager | None = None, instrumentation: Instrumentation | None = None):
+        super().__init__(region, owner)
+        self.view = StatsView(instrumentation)
+        self.add(self.view)
+
+    def arrange(self):
+        self.fixed().add(self.view, 0, 0, *self.size)
+
+    def sample(self):
+        self.view.sample()
@@ -5,11 +5,14 @@ import typing
 
 from .layout import Layout
 from .layout.fixed import FixedLayout
+from .keymap import Keymap
 from .layout.grid import GridLayout
+from .mouse import MouseEvent
+from ._spatial import _GridIndex
 from .struct import rect2, vec2
 from .widgets import Widget
 
-from . import _log
+from . import _log, instrument
 
 
 class Panel(metaclass=ABCMeta):
@@ -22,26 +25,63 @@ class Panel(metaclass=ABCMeta):
     __valid: bool
     __owner: Manager | None
 
+    __damage: dict[rect2, None]  # insertion-ordered set of regions, relative to the panel, to redraw
+    __dirty: dict[Widget, None]  # insertion-ordered set of widgets which have been invalidated
+    __fully_damaged: bool
+    __hit_index: _GridIndex[Widget] | None  # built from the baked regions when first needed
+
+    # the number of widgets which were drawn, and left untouched, by the last render()
+    widgets_rendered: int
+    widgets_skipped: int
+
+    keymap: Keymap  # the bindings which apply while the panel has focus (see App.set_focus)
+
     def __init__(self, region: rect2, owner: Manager | None = None):
-        self.__window = curses.newwin(*region.curses)
+        if owner is not None:
+            self.__window = owner.backend.newwin(*region.curses)
+        else:
+            self.__window = curses.newwin(*region.curses)
         self.__widgets = []
         self.__size, self.__position = region.decompose()
         self.__layout = FixedLayout()
         self.__valid = False
         self.__owner = owner
 
+        self.__damage = {}
+        self.__dirty = {}
+        self.__fully_damaged = True
+        self.__hit_index = None
+        self.widgets_rendered = 0
+        self.widgets_skipped = 0
+        self.keymap = Keymap()
+
     def add(self, widget: Widget):
         widget._adopt(self)
         self.__widgets.append(widget)
 
     def reconfigure(self):
+        instrumentation = instrument.active
+        self.__hit_index = None
         self.__layout.window_size = self.__size
+        start = instrumentation.clock() if instrumentation is not None else 0.0
         self.__layout.bake()
+        if instrumentation is not None:
+            instrumentation.record("bake", start, self)
+            start = instrumentation.clock()
         for widget in self.__widgets:
-            widget.dewindow(erase=False)
-            window = self.__layout.carve(widget, self.__window)
+            if widget.windowed:
+                previous = widget._window
+                window = self.__layout.recarve(widget, self.__window, previous)
+                if window is previous:
+                    continue
+                widget.dewindow(erase=False)
+            else:
+                window = self.__layout.carve(widget, self.__window)
+
             if window is not None:
                 widget.enwindow(window)
+        if instrumentation is not None:
+            instrumentation.record("carve", start, self)
 
     @abstractmethod
     def arrange(self):
@@ -51,36 +91,190 @@ class Panel(metaclass=ABCMeta):
         raise NotImplementedError()
 
     def set_size(self, size: vec2):
-        self.__size = size
-        self.__valid = False
+        if size != self.__size:
+            self.__size = size
+            self.__valid = False
+            self.damage()
 
     def set_position(self, position: vec2):
-        self.__position = position
-        self.__valid = False
+        if position != self.__position:
+            self.__position = position
+            self.__valid = False
+            self.damage()
+
+    def set_region(self, region: rect2):
+        """
+        Sets the size and position of the panel at once, without
+        allocating anything when they are unchanged.
+        """
+        y, x, h, w = region
+        if self.__size.y != h or self.__size.x != w:
+            self.set_size(vec2(h, w))
+        if self.__position.y != y or self.__position.x != x:
+            self.set_position(vec2(y, x))
 
     def __validate(self):
         # FIX: sometimes, a window may be so shaped that, no
         # matter the order of resizing and moving, a curses
         # error will always occur. Need to add logic to
         # mitigate this (perhaps resize to 1, 1 every time?)
-        _log.debug("size: %s" % str(self.__size))
-        _log.debug("position: %s" % str(self.__position))
+        _log.debug("size: %s", self.__size)
+        _log.debug("position: %s", self.__position)
+        instrumentation = instrument.active
+        start = instrumentation.clock() if instrumentation is not None else 0.0
         self.__window.resize(*self.__size)
         self.__window.mvwin(*self.__position)
         self.arrange()
         self.reconfigure()
         self.__valid = True
+        if instrumentation is not None:
+            instrumentation.record("validate", start, self)
+
+    def damage(self, region: rect2 | None = None):
+        """
+        Marks a region of this panel, relative to the panel, as
+        needing to be redrawn on the next call to render(). If no
+        region is specified, the entire panel is damaged.
+        """
+        if region is None:
+            self.__fully_damaged = True
+            self.__damage.clear()
+        elif not self.__fully_damaged:
+            self.__damage[region] = None
+
+        if self.__owner is not None:
+            self.__owner._damage_panel(self)
 
-    def render(self):
+    @property
+    def damaged(self) -> bool:
+        return self.__fully_damaged or len(self.__damage) > 0 or len(self.__dirty) > 0
+
+    def render(self, present: bool = True):
+        """
+        Brings the panel's window up to date with its widgets. If
+        present is False, the window is left off the screen, to be
+        shown later with present().
+        """
+        instrumentation = instrument.active
+        start = instrumentation.clock() if instrumentation is not None else 0.0
         if not self.__valid:
             self.__validate()
+            self.__fully_damaged = True
 
-        self.__window.erase()
-        for widget in self.__widgets:
-            if widget.windowed:
-                widget.render()
+        if self.__fully_damaged:
+            self.__window.erase()
+            rendered = 0
+            for widget in self.__widgets:
+                if widget.windowed:
+                    widget.render()
+                    rendered += 1
+        else:
+            rendered = self.__repair()
+
+        self.__damage.clear()
+        self.__dirty.clear()
+        self.__fully_damaged = False
+        self.widgets_rendered = rendered
+        self.widgets_skipped = len(self.__widgets) - rendered
+        if self.__owner is not None:
+            self.__owner._count_widgets(rendered, self.widgets_skipped)
+        if present:
+            self.__window.noutrefresh()
+        if instrumentation is not None:
+            instrumentation.record("render", start, self)
+            instrumentation.count("panels_rendered")
+
+    def present(self):
+        """
+        Copies the panel's window to the screen again, as of its
+        last render, without re-rendering any of it.
+        """
+        self.__window.touchwin()
         self.__window.noutrefresh()
 
+    def release(self):
+        """
+        Frees most of the memory held by the panel's window by
+        shrinking it to a single cell. The panel is laid out and
+        rendered from scratch the next time it is rendered.
+        """
+        for widget in self.__widgets:
+            widget.dewindow(erase=False)
+        self.__window.resize(1, 1)
+        self.__valid = False
+        self.__fully_damaged = True
+        self.__damage.clear()
+        self.__dirty.clear()
+
+    def __repair(self) -> int:
+        rendered = 0
+        redrawn: set[Widget] = set()
+        if self.__damage:
+            # erase the damaged regions, and redraw every widget overlapping them from scratch
+            for region in self.__damage:
+                for y in range(region.y, region.y + region.h):
+                    self.__window.hline(y, region.x, " ", region.w)
+
+            for widget in self.__widgets:
+                if not widget.windowed:
+                    continue
+
+                widget_region = self.__layout.region(widget)
+                if widget_region is None:
+                    continue
+
+                for region in self.__damage:
+                    if widget_region.intersects(region):
+                        widget._window.erase()
+                        widget.render()
+                        widget._window.syncup()
+                        redrawn.add(widget)
+                        rendered += 1
+                        break
+
+        # the remaining invalidated widgets are the only ones whose windows are out of date
+        for widget in self.__dirty:
+            if widget.windowed and widget not in redrawn:
+                widget.update()
+                widget._window.syncup()
+                rendered += 1
+        return rendered
+
+    def _invalidate_child(self, widget: Widget):
+        if not widget.windowed or self.__layout.region(widget) is None:
+            return
+
+        self.__dirty[widget] = None
+        if self.__owner is not None:
+            self.__owner._damage_panel(self)
+            self.__owner.refresh()
+
+    # mouse input
+    def widget_at(self, position: vec2) -> Widget | None:
+        """
+        Returns the widget covering a position, relative to the
+        panel, as laid out by the last render.
+        """
+        if self.__hit_index is None:
+            layout = self.__layout
+            self.__hit_index = _GridIndex(
+                (region, widget) for widget in self.__widgets
+                if widget.windowed and (region := layout.region(widget)) is not None
+            )
+        hit = self.__hit_index.at(position)
+        return None if hit is None else hit[1]
+
+    def widget_region(self, widget: Widget) -> rect2 | None:
+        return self.__layout.region(widget)
+
+    def on_mouse(self, event: MouseEvent) -> bool:
+        """
+        Handles a mouse event over the panel which none of its
+        widgets handled. event.local is relative to the panel.
+        Returns True if the event was handled.
+        """
+        return False
+
     # layout utilities
     def fixed(self) -> FixedLayout:
         if not isinstance(self.__layout, FixedLayout):
@@ -98,7 +292,7 @@ class Panel(metaclass=ABCMeta):
 
     def request_update(self) -> bool:
         if self.__owner is not None:
-            return self.__owner.request_update(self)
+            return self.__owner.request_update(self) or self.__owner._keeps_offscreen(self)
 
         return False
 
@@ -106,6 +300,10 @@ class Panel(metaclass=ABCMeta):
     def size(self) -> vec2:
         return self.__size
 
+    @property
+    def region(self) -> rect2:
+        return rect2(*self.__position, *self.__size)
+
     @property
     def position(self) -> vec2:
         return self.__position
@@ -1,47 +1,83 @@
 from __future__ import annotations
-from dataclasses import dataclass
+import typing
 
 
-@dataclass(frozen=True)
-class vec2:
+# vec2 and rect2 are allocated constantly during layout, so they are tuples: these are smaller,
+# faster to construct, hash and compare than dataclasses, and unpack into curses calls directly.
+# Being tuples, they compare and hash equal to plain tuples of the same values. The tuple
+# operators which would silently do something other than vector arithmetic (concatenation,
+# repetition and ordering) are disabled.
+
+
+def _unsupported(self, other):
+    raise TypeError("unsupported operation for '%s'" % type(self).__name__)
+
+
+class vec2(typing.NamedTuple):
     y: int = 0
     x: int = 0
 
-    def __add__(self, other: vec2) -> vec2:
+    def __add__(self, other: object) -> vec2:
+        if not isinstance(other, vec2):
+            # Python then raises TypeError, as no other operand accepts a vec2 here
+            return NotImplemented
         return vec2(self.y + other.y, self.x + other.x)
 
-    def __sub__(self, other: vec2) -> vec2:
+    def __sub__(self, other: object) -> vec2:
+        if not isinstance(other, vec2):
+            return NotImplemented
         return vec2(self.y - other.y, self.x - other.x)
 
-    def __iter__(self):
-        yield self.y
-        yield self.x
+    def __neg__(self) -> vec2:
+        return vec2(-self.y, -self.x)
 
-    def __len__(self):
-        return 2
+    # as a subclass of tuple, these are tried before tuple's own operators when a tuple is on the left
+    __radd__ = __rsub__ = __mul__ = __rmul__ = _unsupported
+    __lt__ = __le__ = __gt__ = __ge__ = _unsupported
 
-    def __getitem__(self, index: int):
-        if index == 0:
-            return self.y
-        elif index == 1:
-            return self.x
-        else:
-            raise IndexError("Index out of range")
 
-
-@dataclass(frozen=True)
-class rect2:
+class rect2(typing.NamedTuple):
     y: int = 0
     x: int = 0
     h: int = 0
     w: int = 0
 
+    __add__ = __radd__ = __mul__ = __rmul__ = _unsupported
+    __lt__ = __le__ = __gt__ = __ge__ = _unsupported
+
     def decompose(self) -> tuple[vec2, vec2]:
         """
         Decompose this region into two vectors, size and position.
         """
         return vec2(self.h, self.w), vec2(self.y, self.x)
 
+    def intersects(self, other: rect2) -> bool:
+        return (
+            self.y < other.y + other.h and other.y < self.y + self.h and
+            self.x < other.x + other.w and other.x < self.x + self.w
+        )
+
+    def contains(self, point: vec2) -> bool:
+        return self.y <= point.y < self.y + self.h and self.x <= point.x < self.x + self.w
+
+    def intersection(self, other: rect2) -> rect2:
+        """
+        The region covered by both this region and another. If
+        the regions do not overlap, the result is empty.
+        """
+        y = max(self.y, other.y)
+        x = max(self.x, other.x)
+        end_y = min(self.y + self.h, other.y + other.h)
+        end_x = min(self.x + self.w, other.x + other.w)
+        return rect2(y, x, max(0, end_y - y), max(0, end_x - x))
+
+    def translate(self, offset: vec2) -> rect2:
+        return rect2(self.y + offset.y, self.x + offset.x, self.h, self.w)
+
+    @property
+    def empty(self) -> bool:
+        return self.h <= 0 or self.w <= 0
+
     @property
     def curses(self) -> tuple[int, int, int, int]:
         """
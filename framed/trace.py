@@ -0,0 +1,468 @@
+"""
+Records every call framed makes to the screen into a compact binary
+trace, for replay and analysis away from the session that made it.
+
+    app = framed.App(framed.trace.TraceBackend(stdscr, "session.trace"))
+
+A trace can then be summarized, or replayed against a virtual screen
+(or the terminal) to measure what each frame costs there:
+
+    python -m framed.trace report session.trace
+    python -m framed.trace replay session.trace [--terminal]
+"""
+from __future__ import annotations
+import argparse
+import collections
+import curses
+from dataclasses import dataclass, field
+import os
+import struct
+import sys
+import time
+import typing
+
+from .backend import Backend, VirtualBackend
+from .backend.backend import CursesBackend, as_backend
+from .backend.proxy import ProxyBackend
+
+
+class TraceError(Exception):
+    pass
+
+
+_MAGIC = b"FRTRACE"
+_VERSION = 1
+_HEADER = struct.Struct("<BHH")  # version, rows, columns
+
+# record kinds, each followed by its own fields
+_CALL = 0  # time, window, name; then the arguments
+_NAME = 1  # name id, length; then the name, which later calls refer to by id
+_WINDOW = 2  # time, window; the window created by the preceding call
+_SIZE = 3  # time, rows, columns; the screen was resized
+
+_KIND = struct.Struct("<B")
+_CALL_FIELDS = struct.Struct("<IiHB")  # microseconds since the last record, window id, name id, argument count
+_NAME_FIELDS = struct.Struct("<HB")
+_WINDOW_FIELDS = struct.Struct("<Ii")
+_SIZE_FIELDS = struct.Struct("<IHH")
+
+# argument tags, each followed by its value
+_NONE = 0
+_INT = 1  # <q
+_STR = 2  # <I length, then UTF-8
+_BYTES = 3  # <I length, then the bytes
+_FLOAT = 4  # <d
+_INT_VALUE = struct.Struct("<q")
+_LENGTH = struct.Struct("<I")
+_FLOAT_VALUE = struct.Struct("<d")
+
+_MAX_DELTA = (1 << 32) - 1
+
+# calls whose arguments include text drawn at the cursor or at (y, x)
+_DRAWING_CALLS = frozenset(("addstr", "addnstr", "addch", "insstr", "insnstr", "insch"))
+# calls after which nothing is known about the contents of a window
+_CLEARING_CALLS = frozenset(("erase", "clear", "resize", "scroll", "mvwin", "mvderwin"))
+# calls which read input, and so are not replayed
+_INPUT_CALLS = frozenset(("getch", "getkey", "get_wch"))
+
+
+class TraceBackend(ProxyBackend):
+    """
+    Wraps a screen, writing every call made to its windows (and
+    every doupdate()) to output, with the time at which it was made.
+    The trace is flushed when the main loop stops, and closed by
+    close().
+    """
+
+    __output: typing.BinaryIO
+    __owns_output: bool
+    __names: dict[str, int]
+    __last_time: float
+    __size: tuple[int, int]
+
+    def __init__(self, screen: curses.window | Backend, output: str | os.PathLike | typing.BinaryIO):
+        backend = as_backend(screen)
+        if isinstance(output, (str, os.PathLike)):
+            self.__output = open(output, "wb")
+            self.__owns_output = True
+        else:
+            self.__output = output
+            self.__owns_output = False
+        self.__names = {}
+        self.__last_time = time.perf_counter()
+        self.__size = backend.stdscr.getmaxyx()
+        self.__output.write(_MAGIC + _HEADER.pack(_VERSION, *self.__size))
+        super().__init__(backend)
+
+    def __delta(self) -> int:
+        now = time.perf_counter()
+        delta = min(_MAX_DELTA, int((now - self.__last_time) * 1e6))
+        self.__last_time = now
+        return delta
+
+    def __name_id(self, name: str) -> int:
+        name_id = self.__names.get(name)
+        if name_id is None:
+            name_id = self.__names[name] = len(self.__names)
+            encoded = name.encode("ascii")
+            self.__output.write(_KIND.pack(_NAME) + _NAME_FIELDS.pack(name_id, len(encoded)) + encoded)
+        return name_id
+
+    def _on_call(self, window_id: int, name: str, args: tuple):
+        if name == "doupdate" or name in _INPUT_CALLS:
+            # a resize is reported by the next read of input, and must be replayed before it
+            self.__check_size()
+        name_id = self.__name_id(name)
+        chunks = [_KIND.pack(_CALL), _CALL_FIELDS.pack(self.__delta(), window_id, name_id, len(args))]
+        for arg in args:
+            _encode(arg, chunks)
+        self.__output.write(b"".join(chunks))
+
+    def _on_window(self, window_id: int, window: curses.window):
+        self.__output.write(_KIND.pack(_WINDOW) + _WINDOW_FIELDS.pack(self.__delta(), window_id))
+
+    def __check_size(self):
+        # the screen may have been resized underneath the proxy, by sync_size() or by a test
+        size = self.backend.stdscr.getmaxyx()
+        if size != self.__size:
+            self.__size = size
+            self.__output.write(_KIND.pack(_SIZE) + _SIZE_FIELDS.pack(self.__delta(), *size))
+
+    def sync_size(self):
+        super().sync_size()
+        self.__check_size()
+
+    def stop(self):
+        super().stop()
+        self.__output.flush()
+
+    def close(self):
+        self.__output.flush()
+        if self.__owns_output:
+            self.__output.close()
+
+
+def _encode(arg: typing.Any, chunks: list[bytes]):
+    if isinstance(arg, int):
+        try:
+            chunks.append(bytes((_INT,)) + _INT_VALUE.pack(arg))
+            return
+        except struct.error:
+            pass
+    elif isinstance(arg, str):
+        encoded = arg.encode("utf-8", "surrogatepass")
+        chunks.append(bytes((_STR,)) + _LENGTH.pack(len(encoded)) + encoded)
+        return
+    elif isinstance(arg, bytes):
+        chunks.append(bytes((_BYTES,)) + _LENGTH.pack(len(arg)) + arg)
+        return
+    elif isinstance(arg, float):
+        chunks.append(bytes((_FLOAT,)) + _FLOAT_VALUE.pack(arg))
+        return
+    # anything else cannot be replayed
+    chunks.append(bytes((_NONE,)))
+
+
+# --- Reading ---
+@dataclass(slots=True)
+class Call:
+    time: float  # seconds since the trace started
+    window_id: int  # -1 for calls on the backend
+    name: str
+    args: tuple
+
+
+@dataclass(slots=True)
+class WindowCreated:
+    time: float
+    window_id: int
+
+
+@dataclass(slots=True)
+class Resized:
+    time: float
+    rows: int
+    cols: int
+
+
+Event = Call | WindowCreated | Resized
+
+
+class TraceReader:
+    """
+    Reads the events of a trace written by a TraceBackend, in the
+    order they were recorded.
+    """
+
+    __data: bytes
+    rows: int
+    cols: int
+
+    def __init__(self, data: bytes):
+        if not data.startswith(_MAGIC):
+            raise TraceError("Not a framed trace")
+        version, self.rows, self.cols = _HEADER.unpack_from(data, len(_MAGIC))
+        if version != _VERSION:
+            raise TraceError("Unsupported trace version %d" % version)
+        self.__data = data
+
+    @classmethod
+    def open(cls, path: str | os.PathLike) -> TraceReader:
+        with open(path, "rb") as trace:
+            return cls(trace.read())
+
+    def __iter__(self) -> typing.Iterator[Event]:
+        data = self.__data
+        offset = len(_MAGIC) + _HEADER.size
+        names: dict[int, str] = {}
+        now = 0
+        try:
+            while offset < len(data):
+                kind = data[offset]
+                offset += 1
+                if kind == _CALL:
+                    delta, window_id, name_id, argc = _CALL_FIELDS.unpack_from(data, offset)
+                    offset += _CALL_FIELDS.size
+                    args = []
+                    for _ in range(argc):
+                        arg, offset = _decode(data, offset)
+                        args.append(arg)
+                    now += delta
+                    yield Call(now / 1e6, window_id, names[name_id], tuple(args))
+                elif kind == _NAME:
+                    name_id, length = _NAME_FIELDS.unpack_from(data, offset)
+                    offset += _NAME_FIELDS.size
+                    names[name_id] = data[offset:offset + length].decode("ascii")
+                    offset += length
+                elif kind == _WINDOW:
+                    delta, window_id = _WINDOW_FIELDS.unpack_from(data, offset)
+                    offset += _WINDOW_FIELDS.size
+                    now += delta
+                    yield WindowCreated(now / 1e6, window_id)
+                elif kind == _SIZE:
+                    delta, rows, cols = _SIZE_FIELDS.unpack_from(data, offset)
+                    offset += _SIZE_FIELDS.size
+                    now += delta
+                    yield Resized(now / 1e6, rows, cols)
+                else:
+                    raise TraceError("Unknown record kind %d at offset %d" % (kind, offset - 1))
+        except (struct.error, KeyError, IndexError):
+            # the session ended while a record was being written
+            raise TraceError("Trace is truncated or corrupt at offset %d" % offset)
+
+
+def _decode(data: bytes, offset: int) -> tuple[typing.Any, int]:
+    tag = data[offset]
+    offset += 1
+    if tag == _INT:
+        return _INT_VALUE.unpack_from(data, offset)[0], offset + _INT_VALUE.size
+    elif tag == _STR or tag == _BYTES:
+        length = _LENGTH.unpack_from(data, offset)[0]
+        offset += _LENGTH.size
+        value = data[offset:offset + length]
+        return (value.decode("utf-8", "surrogatepass") if tag == _STR else value), offset + length
+    elif tag == _FLOAT:
+        return _FLOAT_VALUE.unpack_from(data, offset)[0], offset + _FLOAT_VALUE.size
+    return None, offset
+
+
+# --- Analysis ---
+@dataclass(slots=True)
+class FrameCost:
+    index: int
+    start: float
+    duration: float  # from the end of the previous frame to this frame's doupdate()
+    calls: int
+    chars: int  # the number of characters drawn
+    redundant: int  # drawing calls which repeated what was already drawn
+
+
+@dataclass
+class TraceReport:
+    calls: collections.Counter[str] = field(default_factory=collections.Counter)
+    # the time from each call to the next event, which includes framed's own work between calls
+    time: collections.defaultdict[str, float] = field(default_factory=lambda: collections.defaultdict(float))
+    redundant: collections.Counter[str] = field(default_factory=collections.Counter)
+    frames: list[FrameCost] = field(default_factory=list)
+    windows: int = 0
+    duration: float = 0.0
+
+
+def _drawn_text(name: str, args: tuple) -> tuple[tuple[int, int] | None, typing.Any, tuple]:
+    # splits a drawing call's arguments into its explicit position, its text and the rest
+    if len(args) >= 3 and isinstance(args[0], int) and isinstance(args[1], int):
+        return (args[0], args[1]), args[2], args[3:]
+    return None, args[0] if args else None, args[1:]
+
+
+def analyze(reader: typing.Iterable[Event]) -> TraceReport:
+    """
+    Counts the calls in a trace, finds drawing calls which wrote
+    the same text with the same attributes to the same position of
+    a window as the last call to draw there (with nothing erased in
+    between), and measures the cost of each frame.
+    """
+    report = TraceReport()
+    drawn: dict[int, dict[tuple[int, int], tuple]] = collections.defaultdict(dict)
+    cursors: dict[int, tuple[int, int] | None] = {}
+    previous: Call | None = None
+    frame_start = 0.0
+    frame_calls = frame_chars = frame_redundant = 0
+
+    for event in reader:
+        if previous is not None:
+            report.time[previous.name] += event.time - previous.time
+            previous = None
+        report.duration = event.time
+
+        if isinstance(event, WindowCreated):
+            report.windows += 1
+            continue
+        elif isinstance(event, Resized):
+            drawn.clear()
+            continue
+
+        previous = event
+        name, window_id = event.name, event.window_id
+        report.calls[name] += 1
+        frame_calls += 1
+
+        if name == "doupdate":
+            report.frames.append(FrameCost(
+                len(report.frames), frame_start, event.time - frame_start, frame_calls, frame_chars, frame_redundant
+            ))
+            frame_start = event.time
+            frame_calls = frame_chars = frame_redundant = 0
+        elif name == "move":
+            cursors[window_id] = tuple(event.args[:2])
+        elif name in _CLEARING_CALLS:
+            drawn.pop(window_id, None)
+            cursors[window_id] = None
+        elif name in _DRAWING_CALLS:
+            position, text, rest = _drawn_text(name, event.args)
+            if position is None:
+                position = cursors.get(window_id)
+            # the cursor is left somewhere that is not worth tracking
+            cursors[window_id] = None
+            frame_chars += len(text) if isinstance(text, (str, bytes)) else 1
+            if position is None:
+                continue
+
+            window = drawn[window_id]
+            if window.get(position) == (name, text, rest):
+                report.redundant[name] += 1
+                frame_redundant += 1
+            else:
+                window[position] = (name, text, rest)
+        elif name in ("hline", "vline"):
+            drawn.pop(window_id, None)
+            cursors[window_id] = None
+
+    return report
+
+
+# --- Replay ---
+def replay(reader: TraceReader, backend: Backend) -> list[float]:
+    """
+    Makes the calls recorded in a trace on backend, returning the
+    time each frame took to replay. Calls which fail are skipped.
+    """
+    windows: dict[int, typing.Any] = {}
+    created = None
+    frame_times = []
+    frame_start = time.perf_counter()
+    for event in reader:
+        if isinstance(event, WindowCreated):
+            windows[event.window_id] = backend.stdscr if event.window_id == 0 else created
+            continue
+        elif isinstance(event, Resized):
+            if isinstance(backend, VirtualBackend):
+                backend.resize(event.rows, event.cols)
+            continue
+
+        created = None
+        if event.window_id == -1:
+            target = backend
+        else:
+            target = windows.get(event.window_id)
+            if target is None:
+                continue
+
+        if event.name in _INPUT_CALLS or any(arg is None for arg in event.args):
+            continue
+        try:
+            created = getattr(target, event.name)(*event.args)
+        except (curses.error, AttributeError, TypeError):
+            continue
+
+        if event.name == "doupdate":
+            now = time.perf_counter()
+            frame_times.append(now - frame_start)
+            frame_start = now
+    return frame_times
+
+
+# --- Command line ---
+def _print_report(report: TraceReport, top: int):
+    print("%d calls, %d windows and %d frames over %.3fs" % (
+        sum(report.calls.values()), report.windows, len(report.frames), report.duration
+    ))
+    print()
+    print("%-16s %10s %10s %12s" % ("call", "count", "redundant", "time (ms)"))
+    for name, count in report.calls.most_common():
+        print("%-16s %10d %10d %12.3f" % (name, count, report.redundant[name], report.time[name] * 1000))
+
+    if report.frames:
+        print()
+        print("Most expensive frames:")
+        print("%8s %10s %12s %8s %8s %10s" % ("frame", "start (s)", "time (ms)", "calls", "chars", "redundant"))
+        for frame in sorted(report.frames, key=lambda frame: frame.duration, reverse=True)[:top]:
+            print("%8d %10.3f %12.3f %8d %8d %10d" % (
+                frame.index, frame.start, frame.duration * 1000, frame.calls, frame.chars, frame.redundant
+            ))
+
+
+def _replay_command(reader: TraceReader, terminal: bool, top: int):
+    if terminal:
+        frame_times = curses.wrapper(lambda stdscr: replay(reader, CursesBackend(stdscr)))
+        cells = None
+    else:
+        backend = VirtualBackend(reader.rows, reader.cols)
+        frame_times = replay(reader, backend)
+        cells = backend.cells_written
+
+    total = sum(frame_times)
+    print("Replayed %d frames in %.3fms" % (len(frame_times), total * 1000))
+    if cells is not None:
+        print("%d cells written to the screen" % cells)
+    ranked = sorted(enumerate(frame_times), key=lambda frame: frame[1], reverse=True)[:top]
+    for index, duration in ranked:
+        print("frame %8d %12.3fms" % (index, duration * 1000))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m framed.trace", description="Analyzes framed traces.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_parser = commands.add_parser("report", help="summarize the calls and frames in a trace")
+    report_parser.add_argument("trace")
+    report_parser.add_argument("--top", type=int, default=10, help="the number of frames to list")
+    replay_parser = commands.add_parser("replay", help="replay a trace, timing each frame")
+    replay_parser.add_argument("trace")
+    replay_parser.add_argument("--terminal", action="store_true", help="replay on the terminal, rather than in memory")
+    replay_parser.add_argument("--top", type=int, default=10, help="the number of frames to list")
+    args = parser.parse_args(argv)
+
+    try:
+        reader = TraceReader.open(args.trace)
+        if args.command == "report":
+            _print_report(analyze(reader), args.top)
+        else:
+            _replay_command(reader, args.terminal, args.top)
+    except (OSError, TraceError) as error:
+        print("%s: %s" % (parser.prog, error), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
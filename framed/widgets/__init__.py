@@ -1,5 +1,12 @@
+from .chart import LineChart, Sparkline
+from .fileview import FileView
 from .label import Label
+from .logview import LogView
+from .statsview import StatsView
+from .table import Column, Table
 
 from .widget import Widget
 
-__all__ = ["Label", "Widget"]
+__all__ = [
+    "Column", "FileView", "Label", "LineChart", "LogView", "Sparkline", "StatsView", "Table", "Widget"
+]
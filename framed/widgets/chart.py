@@ -0,0 +1,227 @@
+from abc import abstractmethod
+from array import array
+import typing
+
+from .._encoding import unicode_supported
+from .widget import Widget, invalidate
+
+try:
+    import numpy  # pyright: ignore[reportMissingImports]
+except ImportError:  # numpy is optional, and only used to speed up downsampling
+    numpy = None
+
+
+_SPARKS = "▁▂▃▄▅▆▇█"
+_ASCII_SPARKS = "_.-:=+*#"
+
+
+class _Chart(Widget):
+    """
+    The base of widgets which plot the most recent samples of a
+    series. Samples are kept in a circular array of fixed
+    capacity, and are downsampled to one bucket per column of the
+    widget, keeping the minimum and maximum of each bucket so that
+    spikes are never lost. The rows are only redrawn when they
+    differ from what was last drawn, and a repaint is only requested
+    when a new sample changes what would be drawn, so samples may be
+    pushed far more often than the chart visibly changes.
+
+    If ascii_glyphs is None, the chart is drawn with block and
+    box-drawing characters only if the locale's encoding can
+    represent them.
+    """
+
+    __capacity: int
+    __ring: array
+    __start: int  # index in __ring of the oldest sample
+    __count: int
+    __minimum: float | None
+    __maximum: float | None
+    __drawn: list[str]  # the rows as of the last render
+    __stale: bool  # whether a repaint has been requested since the last render
+    __ascii_glyphs: bool
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        minimum: float | None = None,
+        maximum: float | None = None,
+        ascii_glyphs: bool | None = None,
+    ):
+        super().__init__()
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1!")
+        self.__capacity = capacity
+        self.__ring = array("d", bytes(8 * capacity))
+        self.__start = 0
+        self.__count = 0
+        self.__minimum = minimum
+        self.__maximum = maximum
+        self.__drawn = []
+        self.__stale = False
+        if ascii_glyphs is None:
+            ascii_glyphs = not unicode_supported(_SPARKS + "─│")
+        self.__ascii_glyphs = ascii_glyphs
+
+    @property
+    def ascii_glyphs(self) -> bool:
+        return self.__ascii_glyphs
+
+    # --- Samples ---
+    @invalidate
+    def push(self, value: float) -> bool:
+        self.__push(value)
+        return self.__changed()
+
+    @invalidate
+    def extend(self, values: typing.Iterable[float]) -> bool:
+        pushed = False
+        for value in values:
+            self.__push(value)
+            pushed = True
+        return pushed and self.__changed()
+
+    @invalidate
+    def clear(self) -> bool:
+        if self.__count == 0:
+            return False
+        self.__start = 0
+        self.__count = 0
+        return True
+
+    def __push(self, value: float):
+        if self.__count < self.__capacity:
+            self.__ring[(self.__start + self.__count) % self.__capacity] = value
+            self.__count += 1
+        else:
+            self.__ring[self.__start] = value
+            self.__start = (self.__start + 1) % self.__capacity
+
+    def __changed(self) -> bool:
+        # once a repaint has been requested, later samples are drawn by it without checking again
+        if not self.windowed:
+            return False
+        if not self.__stale:
+            self.__stale = self.__compute_rows() != self.__drawn
+        return self.__stale
+
+    def __len__(self) -> int:
+        return self.__count
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    def samples(self) -> array:
+        """
+        Returns the samples held by the chart, oldest first.
+        """
+        ring = self.__ring
+        if self.__count < self.__capacity:
+            return ring[:self.__count]
+        return ring[self.__start:] + ring[:self.__start]
+
+    # --- Downsampling ---
+    def __buckets(self, columns: int) -> tuple[typing.Sequence[float], typing.Sequence[float]]:
+        # the minimum and maximum of each bucket, with one bucket per column (or per sample, if
+        # there are fewer samples than columns)
+        samples = self.samples()
+        count = len(samples)
+        buckets = min(columns, count)
+        edges = [index * count // buckets for index in range(buckets)]
+        if numpy is not None:
+            values = numpy.frombuffer(samples, dtype=numpy.float64)
+            return numpy.minimum.reduceat(values, edges).tolist(), numpy.maximum.reduceat(values, edges).tolist()
+
+        edges.append(count)
+        minima = [min(samples[edges[index]:edges[index + 1]]) for index in range(buckets)]
+        maxima = [max(samples[edges[index]:edges[index + 1]]) for index in range(buckets)]
+        return minima, maxima
+
+    def __scale(self, minima: typing.Sequence[float], maxima: typing.Sequence[float]) -> tuple[float, float]:
+        low = min(minima) if self.__minimum is None else self.__minimum
+        high = max(maxima) if self.__maximum is None else self.__maximum
+        return low, high
+
+    @abstractmethod
+    def _rows(
+        self, minima: typing.Sequence[float], maxima: typing.Sequence[float], low: float, high: float
+    ) -> list[str]:
+        """
+        Draws the bucketed samples as text, one string per row.
+        Values are scaled so that low is at the bottom of the
+        chart and high is at the top.
+        """
+        raise NotImplementedError()
+
+    # --- Rendering ---
+    def __compute_rows(self) -> list[str]:
+        height, width = self.size
+        if self.__count == 0 or height < 1 or width < 1:
+            # blank rows of the full width, so that update() erases whatever was drawn before
+            return [" " * max(0, width)] * max(0, height)
+
+        minima, maxima = self.__buckets(width)
+        low, high = self.__scale(minima, maxima)
+        # the newest samples are always at the right-hand edge
+        padding = " " * (width - len(minima))
+        return [padding + row for row in self._rows(minima, maxima, low, high)]
+
+    def render(self):
+        self.__stale = False
+        self.__drawn = rows = self.__compute_rows()
+        for y, row in enumerate(rows):
+            self._draw(y, 0, row)
+
+    def update(self):
+        self.__stale = False
+        rows = self.__compute_rows()
+        if len(rows) != len(self.__drawn):
+            super().update()
+            return
+
+        for y, (row, drawn) in enumerate(zip(rows, self.__drawn)):
+            if row != drawn:
+                self._draw(y, 0, row)
+        self.__drawn = rows
+
+
+def _level(value: float, low: float, high: float, levels: int) -> int:
+    # maps value onto one of levels steps between low and high
+    if high <= low:
+        return 0
+    level = int((value - low) / (high - low) * (levels - 1) + 0.5)
+    return max(0, min(levels - 1, level))
+
+
+class Sparkline(_Chart):
+    """
+    A single-row chart, drawn with block characters whose height
+    follows the maximum of each bucket.
+    """
+
+    def _rows(self, minima, maxima, low, high):
+        sparks = _ASCII_SPARKS if self.ascii_glyphs else _SPARKS
+        return ["".join(sparks[_level(value, low, high, len(sparks))] for value in maxima)]
+
+
+class LineChart(_Chart):
+    """
+    A chart filling the widget's height. Each column spans the
+    range between the minimum and maximum of its bucket.
+    """
+
+    def _rows(self, minima, maxima, low, high):
+        height = self.size.y
+        columns = len(minima)
+        flat, steep = ("-", "|") if self.ascii_glyphs else ("─", "│")
+        grid = [[" "] * columns for _ in range(height)]
+        for column in range(columns):
+            top = height - 1 - _level(maxima[column], low, high, height)
+            bottom = height - 1 - _level(minima[column], low, high, height)
+            if top == bottom:
+                grid[top][column] = flat
+            else:
+                for row in range(top, bottom + 1):
+                    grid[row][column] = steep
+        return ["".join(row) for row in grid]
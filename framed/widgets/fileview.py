@@ -0,0 +1,276 @@
+from array import array
+import bisect
+import mmap
+import os
+import re
+import threading
+import typing
+
+from .widget import Widget, invalidate
+from .._cache import LRUCache
+from .. import _log
+
+
+class FileView(Widget):
+    """
+    A read-only view of a file, which may be far larger than
+    memory. The file is memory-mapped, and only the lines in the
+    viewport are decoded and drawn. The viewport is tracked as a
+    byte offset, so scrolling, jumping to a percentage of the file
+    and searching never need to know line numbers. An index of line
+    offsets is only needed to jump to a line number; it is built
+    chunk by chunk, on demand and (if background is True) by a
+    background thread.
+
+    The file stays open until close() is called, or the view is
+    used as a context manager and its block exits.
+    """
+
+    CHUNK_SIZE = 1 << 20
+    LONG_LINE = 4096  # lines longer than this have their ends cached, rather than being scanned again
+    LONG_LINE_CACHE_SIZE = 256
+
+    __file: typing.BinaryIO
+    __map: mmap.mmap | None  # None if the file is empty
+    __size: int
+    __encoding: str
+    __top: int  # byte offset of the first line in the viewport
+    __line_ends: LRUCache[int, int]  # where each recently scanned long line ends
+
+    __lines: array  # byte offset at which each indexed line starts
+    __indexed: int  # the number of bytes which have been indexed
+    __index_lock: threading.Lock
+    __closed: threading.Event
+    __indexer: threading.Thread | None
+
+    def __init__(self, path: str | os.PathLike, encoding: str = "utf-8", background: bool = True):
+        super().__init__()
+        self.__file = open(path, "rb")
+        self.__size = os.fstat(self.__file.fileno()).st_size
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) if self.__size else None
+        self.__encoding = encoding
+        self.__top = 0
+        self.__line_ends = LRUCache(self.LONG_LINE_CACHE_SIZE)
+
+        self.__lines = array("Q", [0])
+        self.__indexed = 0
+        self.__index_lock = threading.Lock()
+        self.__closed = threading.Event()
+        self.__indexer = None
+        if background and self.__size:
+            self.__indexer = threading.Thread(target=self.__index_all, name="FileView indexer", daemon=True)
+            self.__indexer.start()
+
+    def close(self):
+        self.__closed.set()
+        indexer, self.__indexer = self.__indexer, None
+        # the view may be collected by the indexer itself, as it drops its last reference
+        if indexer is not None and indexer is not threading.current_thread():
+            indexer.join()
+        with self.__index_lock:
+            if self.__map is not None:
+                self.__map.close()
+                self.__map = None
+            self.__file.close()
+
+    def __enter__(self) -> "FileView":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except AttributeError:
+            # __init__ failed before the file was opened
+            pass
+
+    @property
+    def file_size(self) -> int:
+        return self.__size
+
+    # --- Line index ---
+    @property
+    def indexed(self) -> bool:
+        """
+        Whether every line in the file has been indexed.
+        """
+        return self.__indexed >= self.__size
+
+    @property
+    def line_count(self) -> int | None:
+        """
+        The number of lines in the file, or None if the file has
+        not been completely indexed yet.
+        """
+        if not self.indexed:
+            return None
+        return len(self.__lines) if self.__size else 0
+
+    @property
+    def top_line(self) -> int | None:
+        """
+        The number of the line at the top of the viewport, or None
+        if the index has not reached it yet.
+        """
+        if self.__top > self.__indexed:
+            return None
+        return bisect.bisect_right(self.__lines, self.__top) - 1
+
+    def __index_chunk(self) -> bool:
+        # indexes the next chunk of the file, returning False once there is nothing left
+        with self.__index_lock:
+            mapped = self.__map
+            start = self.__indexed
+            if mapped is None or start >= self.__size:
+                return False
+
+            end = min(start + self.CHUNK_SIZE, self.__size)
+            lines = self.__lines
+            find = mapped.find
+            position = find(b"\n", start, end)
+            while position != -1:
+                # a trailing newline ends the last line rather than starting a new one
+                if position + 1 < self.__size:
+                    lines.append(position + 1)
+                position = find(b"\n", position + 1, end)
+            self.__indexed = end
+            return True
+
+    def __index_all(self):
+        try:
+            while not self.__closed.is_set() and self.__index_chunk():
+                pass
+        except (ValueError, OSError):
+            # the map was closed underneath the indexer
+            _log.exception("Failed to index file")
+
+    def __index_to_line(self, line: int):
+        while len(self.__lines) <= line and self.__index_chunk():
+            pass
+
+    # --- Navigation ---
+    def scroll(self, lines: int):
+        """
+        Scrolls the viewport down (or up, if lines is negative).
+        """
+        offset = self.__top
+        if lines > 0:
+            for _ in range(lines):
+                following = self.__next_line(offset)
+                if following is None:
+                    break
+                offset = following
+        else:
+            for _ in range(-lines):
+                if offset == 0:
+                    break
+                offset = self.__line_start(offset - 1)
+        self.__set_top(offset)
+
+    def goto_line(self, line: int):
+        """
+        Scrolls so that the line with the given (zero-based) number
+        is at the top of the viewport, indexing the file as far as
+        that line if necessary.
+        """
+        if line < 0:
+            raise ValueError("line must not be negative!")
+        self.__index_to_line(line)
+        lines = self.__lines
+        self.__set_top(lines[min(line, len(lines) - 1)])
+
+    def goto_percent(self, percent: float):
+        """
+        Scrolls to the line containing the byte at the given
+        percentage of the way through the file.
+        """
+        percent = max(0.0, min(100.0, percent))
+        offset = min(int(self.__size * percent / 100), max(0, self.__size - 1))
+        self.__set_top(self.__line_start(offset))
+
+    def search(self, pattern: str | bytes | re.Pattern[bytes]) -> bool:
+        """
+        Searches forward from the line after the top of the viewport,
+        and scrolls to the first line containing a match. Returns
+        False, leaving the viewport where it is, if there is none.
+        """
+        if self.__map is None:
+            return False
+
+        start = self.__next_line(self.__top)
+        if start is None:
+            return False
+
+        if isinstance(pattern, re.Pattern):
+            found = pattern.search(self.__map, start)
+            position = -1 if found is None else found.start()
+        else:
+            if isinstance(pattern, str):
+                pattern = pattern.encode(self.__encoding)
+            position = self.__map.find(pattern, start)
+
+        if position == -1:
+            return False
+        self.__set_top(self.__line_start(position))
+        return True
+
+    @invalidate
+    def __set_top(self, offset: int) -> bool:
+        if offset == self.__top:
+            return False
+        self.__top = offset
+        return True
+
+    def __line_start(self, offset: int) -> int:
+        if self.__map is None:
+            return 0
+        return self.__map.rfind(b"\n", 0, offset) + 1
+
+    def __next_line(self, offset: int) -> int | None:
+        if self.__map is None:
+            return None
+        position = self.__line_end(offset)
+        if position + 1 >= self.__size:
+            return None
+        return position + 1
+
+    def __line_end(self, offset: int, limit: int | None = None) -> int:
+        # the offset of the newline ending the line starting at offset (or the size of the file),
+        # searching no further than limit: if the line is longer, limit is returned
+        mapped = self.__map
+        if mapped is None:
+            return 0
+        end = self.__line_ends.get(offset)
+        if end is None:
+            stop = self.__size if limit is None else min(limit, self.__size)
+            end = mapped.find(b"\n", offset, stop)
+            if end == -1:
+                if stop < self.__size:
+                    return stop
+                end = self.__size
+            if end - offset > self.LONG_LINE:
+                self.__line_ends.put(offset, end)
+        return end if limit is None else min(end, limit)
+
+    # --- Rendering ---
+    def render(self):
+        mapped = self.__map
+        if mapped is None:
+            return
+
+        height, width = self.size
+        offset = self.__top
+        for row in range(height):
+            if offset >= self.__size:
+                break
+
+            # a character is at most 4 bytes, so there is no need to search or decode past the
+            # window's edge, unless another row follows the line
+            visible = self.__line_end(offset, offset + width * 4)
+            text = mapped[offset:visible].decode(self.__encoding, "replace")
+            self._draw(row, 0, text.rstrip("\r").replace("\0", "\ufffd"), limit=width)
+            if row + 1 == height:
+                break
+            offset = (visible if mapped[visible:visible + 1] == b"\n" else self.__line_end(offset)) + 1
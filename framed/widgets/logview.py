@@ -0,0 +1,208 @@
+import itertools
+import typing
+
+from .widget import Widget, invalidate
+from ..struct import vec2
+
+
+class LogView(Widget):
+    """
+    A scrolling view of lines of text, such as the tail of a log.
+    Lines are kept in a ring buffer of fixed capacity, so that
+    appending is O(1) and the oldest lines are discarded once it
+    is full. Only the lines in the viewport are drawn. While the
+    view is pinned to the bottom, appended lines are shown by
+    scrolling the window rather than redrawing it.
+    """
+
+    __capacity: int
+    __ring: list[str]
+    __start: int  # index in __ring of the oldest line
+    __count: int
+    __discarded: int  # the number of lines that have been dropped from the front of the ring
+
+    __top: int  # line number (counting discarded lines) of the first line in the viewport
+    __pinned: bool
+
+    # the viewport as of the last render, which update() scrolls to follow appended lines
+    # unless something else about the viewport has changed since then
+    __drawn_top: int
+    __drawn_rows: int
+    __stale: bool
+
+    def __init__(self, capacity: int = 10000):
+        super().__init__()
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1!")
+        self.__capacity = capacity
+        self.__ring = [""] * capacity
+        self.__start = 0
+        self.__count = 0
+        self.__discarded = 0
+        self.__top = 0
+        self.__pinned = True
+        self.__drawn_top = 0
+        self.__drawn_rows = 0
+        self.__stale = False
+
+    # --- Content ---
+    @invalidate
+    def append(self, text: str) -> bool:
+        """
+        Appends text to the view. Each line of the text becomes a
+        separate line in the view.
+        """
+        return self.__append_lines(text.split("\n"))
+
+    @invalidate
+    def extend(self, lines: typing.Iterable[str]) -> bool:
+        """
+        Appends each of the given texts to the view, as append() does.
+        """
+        return self.__append_lines(itertools.chain.from_iterable(line.split("\n") for line in lines))
+
+    @invalidate
+    def clear(self) -> bool:
+        self.__discarded += self.__count
+        self.__start = 0
+        self.__count = 0
+        self.__top = self.__first_line
+        self.__stale = True
+        return True
+
+    def line(self, index: int) -> str:
+        """
+        Returns the line at index, where 0 is the oldest line still
+        held by the view.
+        """
+        if not 0 <= index < self.__count:
+            raise IndexError("line index out of range")
+        return self.__ring[(self.__start + index) % self.__capacity]
+
+    def __len__(self) -> int:
+        return self.__count
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    def __append_lines(self, lines: typing.Iterable[str]) -> bool:
+        ring = self.__ring
+        capacity = self.__capacity
+        appended = 0
+        for line in lines:
+            if self.__count < capacity:
+                ring[(self.__start + self.__count) % capacity] = line
+                self.__count += 1
+            else:
+                ring[self.__start] = line
+                self.__start = (self.__start + 1) % capacity
+                self.__discarded += 1
+            appended += 1
+
+        if appended == 0:
+            return False
+
+        if self.__pinned:
+            self.__top = self.__last_top
+            return True
+
+        if self.__top < self.__first_line:
+            # lines in the viewport were discarded, so the viewport moves down with them
+            self.__top = self.__first_line
+            return True
+
+        # the new lines are only visible if the viewport was not already full
+        return self.__top + self.size.y > self.__first_line + self.__count - appended
+
+    # --- Scrolling ---
+    @invalidate
+    def scroll(self, lines: int) -> bool:
+        """
+        Scrolls the viewport down (or up, if lines is negative).
+        Scrolling to the bottom pins the view, so that it follows
+        appended lines; scrolling away from the bottom unpins it.
+        """
+        return self.__scroll_to(self.__top + lines)
+
+    @invalidate
+    def scroll_to(self, index: int) -> bool:
+        """
+        Scrolls the viewport so that the line at index is at the
+        top of it, where 0 is the oldest line held by the view.
+        """
+        return self.__scroll_to(self.__first_line + index)
+
+    @invalidate
+    def scroll_to_tail(self) -> bool:
+        return self.__scroll_to(self.__last_top)
+
+    @property
+    def pinned(self) -> bool:
+        return self.__pinned
+
+    @property
+    def top(self) -> int:
+        """
+        The index of the line at the top of the viewport.
+        """
+        return self.__top - self.__first_line
+
+    @property
+    def __first_line(self) -> int:
+        return self.__discarded
+
+    @property
+    def __last_top(self) -> int:
+        return self.__first_line + max(0, self.__count - self.size.y)
+
+    def __scroll_to(self, top: int) -> bool:
+        top = max(self.__first_line, min(top, self.__last_top))
+        self.__pinned = top == self.__last_top
+        if top == self.__top:
+            return False
+
+        self.__top = top
+        self.__stale = True
+        return True
+
+    # --- Rendering ---
+    def set_size(self, size: vec2):
+        super().set_size(size)
+        if self.__pinned:
+            self.__top = self.__last_top
+        else:
+            self.__top = max(self.__first_line, min(self.__top, self.__last_top))
+        self.__stale = True
+
+    def render(self):
+        self.__draw_rows(0)
+        self.__stale = False
+
+    def update(self):
+        shift = self.__top - self.__drawn_top
+        kept = self.__drawn_rows - shift  # rows drawn by the last render that are still visible
+        if self.__stale or shift < 0 or kept <= 0:
+            super().update()
+            return
+
+        if shift > 0:
+            # the rows scrolled in are left blank, ready for the new lines
+            window = self._window
+            window.idlok(True)
+            window.scrollok(True)
+            window.scroll(shift)
+            window.scrollok(False)
+        self.__draw_rows(kept)
+
+    def __draw_rows(self, start: int):
+        width = self.size.x
+        ring = self.__ring
+        capacity = self.__capacity
+        offset = self.__top - self.__first_line
+        rows = max(0, min(self.size.y, self.__count - offset))
+        for row in range(start, rows):
+            self._draw(row, 0, ring[(self.__start + offset + row) % capacity], limit=width)
+
+        self.__drawn_top = self.__top
+        self.__drawn_rows = rows
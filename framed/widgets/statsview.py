@@ -0,0 +1,51 @@
+import curses
+
+from .widget import Widget, invalidate
+from .. import instrument
+
+
+class StatsView(Widget):
+    """
+    A table of the histograms collected by an Instrumentation: the
+    last, mean, 95th percentile and maximum value of each timing
+    (in milliseconds) and count per frame. The view only changes
+    when sample() is called, so that drawing it does not itself
+    produce a stream of frames; call sample() from a timer.
+    """
+
+    __instrumentation: instrument.Instrumentation | None
+    __rows: list[str]
+
+    def __init__(self, instrumentation: instrument.Instrumentation | None = None):
+        super().__init__()
+        self.__instrumentation = instrumentation
+        self.__rows = []
+
+    @invalidate
+    def sample(self) -> bool:
+        """
+        Takes a snapshot of the histograms of the given
+        Instrumentation, or of the enabled one if none was given.
+        """
+        instrumentation = self.__instrumentation or instrument.active
+        rows = ["%-16s %9s %9s %9s %9s" % ("", "last", "mean", "p95", "max")]
+        if instrumentation is not None:
+            for name, histogram in sorted(instrumentation.timings.items()):
+                rows.append("%-16s %9.2f %9.2f %9.2f %9.2f" % (
+                    name + " ms", histogram.last * 1000, histogram.mean * 1000,
+                    histogram.percentile(95) * 1000, histogram.maximum * 1000
+                ))
+            for name, histogram in sorted(instrumentation.counts.items()):
+                rows.append("%-16s %9d %9.1f %9d %9d" % (
+                    name, histogram.last, histogram.mean, histogram.percentile(95), histogram.maximum
+                ))
+
+        if rows == self.__rows:
+            return False
+        self.__rows = rows
+        return True
+
+    def render(self):
+        height, width = self.size
+        for y, row in enumerate(self.__rows[:height]):
+            self._draw(y, 0, row, curses.A_REVERSE if y == 0 else 0, width)
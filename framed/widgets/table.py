@@ -0,0 +1,288 @@
+from array import array
+import curses
+from dataclasses import dataclass
+import itertools
+import numbers
+import typing
+
+from .widget import Widget, WidgetError, invalidate
+from .._cache import LRUCache
+
+try:
+    import numpy  # pyright: ignore[reportMissingImports]
+except ImportError:  # numpy is optional, and only used if columns are given as numpy arrays
+    numpy = None
+
+if typing.TYPE_CHECKING:
+    from numpy import ndarray  # pyright: ignore[reportMissingImports]
+
+
+@dataclass
+class Column:
+    name: str
+    width: int
+    format: str = ""  # a format spec, as accepted by format()
+    align: str | None = None  # "<" or ">"; numbers are right-aligned by default
+
+
+# the indices of the rows in the order they are shown
+_View = typing.Union[range, array, "ndarray"]
+
+
+def _store(values: typing.Iterable[typing.Any]) -> typing.Sequence[typing.Any] | "ndarray":
+    # keeps a column in the most compact form that can hold its values
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return values
+
+    values = values if isinstance(values, (list, tuple, array)) else list(values)
+    # only exact ints and floats fit an array without changing how they are shown: bools would
+    # become 1 and 0, and Decimals would be rounded to floats
+    types = set(map(type, values))
+    if types <= {int}:
+        try:
+            return array("q", values)
+        except OverflowError:
+            # too large for an array, and a float would lose precision
+            return list(values)
+    if types <= {int, float}:
+        return array("d", values)
+    return list(values)
+
+
+def _is_numeric(values: typing.Sequence[typing.Any] | "ndarray") -> bool:
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        # without numpy installed, type checkers can't narrow values to an ndarray
+        dtype = typing.cast("ndarray", values).dtype
+        return bool(numpy.issubdtype(dtype, numpy.number))
+    if isinstance(values, array):
+        return True
+    return bool(values) and all(
+        isinstance(value, numbers.Number) and not isinstance(value, bool) for value in values
+    )
+
+
+class Table(Widget):
+    """
+    A table of rows and columns, drawn one row per line beneath a
+    header. Each column is stored as a compact array (or as the
+    numpy array it was given as), and only the rows and columns
+    in the viewport are formatted and drawn, so the table may hold
+    millions of rows. Formatted cells are kept in an LRU cache.
+    Sorting and filtering only compute a permutation of the row
+    indices; the permutations for the most recent sorts are kept
+    until the data changes, so switching between them is immediate.
+    """
+
+    CELL_CACHE_SIZE = 4096
+    SORT_CACHE_SIZE = 4  # each permutation takes 8 bytes per row
+
+    __columns: list[Column]
+    __data: list[typing.Sequence[typing.Any]]
+    __numeric: list[bool]  # whether each column holds numbers, which are right-aligned by default
+    __rows: int
+
+    __sort: tuple[int, bool] | None  # the sorted column, and whether it is descending
+    __sorts: LRUCache[tuple[int, bool], _View]
+    __mask: bytearray | None  # for each row, whether it passes the filter
+    __view: _View
+
+    __top: int  # position in the view of the first row shown
+    __left: int  # index of the first column shown
+    __cells: LRUCache[tuple[int, int], str]
+
+    def __init__(self, columns: typing.Sequence[Column]):
+        super().__init__()
+        if not columns:
+            raise WidgetError("A table must have at least one column!")
+        self.__columns = list(columns)
+        self.__data = [[] for _ in self.__columns]
+        self.__numeric = [False] * len(self.__columns)
+        self.__rows = 0
+        self.__sort = None
+        self.__sorts = LRUCache(self.SORT_CACHE_SIZE)
+        self.__mask = None
+        self.__view = range(0)
+        self.__top = 0
+        self.__left = 0
+        self.__cells = LRUCache(self.CELL_CACHE_SIZE)
+
+    # --- Data ---
+    @invalidate
+    def set_data(self, columns: typing.Mapping[str, typing.Iterable[typing.Any]]) -> bool:
+        """
+        Replaces the table's contents with the given values for each
+        column, keyed by column name. Every column must be given the
+        same number of values. Any filter is removed.
+        """
+        data = []
+        for column in self.__columns:
+            if column.name not in columns:
+                raise WidgetError("No data given for column '%s'" % column.name)
+            data.append(_store(columns[column.name]))
+
+        rows = len(data[0])
+        if any(len(values) != rows for values in data):
+            raise WidgetError("Every column must have the same number of rows!")
+
+        self.__data = data
+        self.__numeric = [_is_numeric(values) for values in data]
+        self.__rows = rows
+        self.__sorts.clear()
+        self.__mask = None
+        self.__cells.clear()
+        self.__rebuild_view()
+        return True
+
+    def value(self, row: int, column: str) -> typing.Any:
+        """
+        Returns the value in the given column of the row shown at
+        position row, after sorting and filtering.
+        """
+        return self.__data[self.__column_index(column)][self.__view[row]]
+
+    def __len__(self) -> int:
+        """
+        The number of rows shown, after filtering.
+        """
+        return len(self.__view)
+
+    @property
+    def columns(self) -> list[Column]:
+        return list(self.__columns)
+
+    # --- Sorting and filtering ---
+    @invalidate
+    def sort_by(self, column: str | None, descending: bool = False) -> bool:
+        """
+        Orders the rows by the values in a column, or restores their
+        original order if column is None.
+        """
+        sort = None if column is None else (self.__column_index(column), descending)
+        if sort == self.__sort:
+            return False
+        self.__sort = sort
+        self.__rebuild_view()
+        return True
+
+    @invalidate
+    def set_filter(self, column: str, predicate: typing.Callable[[typing.Any], bool]) -> bool:
+        """
+        Only shows the rows for which predicate returns True when
+        given their value in column.
+        """
+        values = self.__data[self.__column_index(column)]
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            self.__mask = bytearray(numpy.fromiter(map(predicate, values), dtype=bool, count=len(values)).tobytes())
+        else:
+            self.__mask = bytearray(map(bool, map(predicate, values)))
+        self.__rebuild_view()
+        return True
+
+    @invalidate
+    def clear_filter(self) -> bool:
+        if self.__mask is None:
+            return False
+        self.__mask = None
+        self.__rebuild_view()
+        return True
+
+    def __rebuild_view(self):
+        if self.__sort is None:
+            order = range(self.__rows)
+        else:
+            order = self.__sorts.get(self.__sort)
+            if order is None:
+                order = self.__permutation(*self.__sort)
+                self.__sorts.put(self.__sort, order)
+
+        if self.__mask is not None:
+            mask = self.__mask
+            if numpy is not None and isinstance(order, numpy.ndarray):
+                order = order[numpy.frombuffer(mask, dtype=bool)[order]]
+            else:
+                order = array("q", itertools.compress(order, map(mask.__getitem__, order)))
+
+        self.__view = order
+        self.__top = max(0, min(self.__top, len(order) - 1))
+
+    def __permutation(self, column: int, descending: bool) -> _View:
+        values = self.__data[column]
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            order = numpy.argsort(values, kind="stable")
+            return order[::-1].copy() if descending else order
+        return array("q", sorted(range(self.__rows), key=values.__getitem__, reverse=descending))
+
+    def __column_index(self, name: str) -> int:
+        for index, column in enumerate(self.__columns):
+            if column.name == name:
+                return index
+        raise WidgetError("No column named '%s'" % name)
+
+    # --- Scrolling ---
+    @invalidate
+    def scroll(self, rows: int) -> bool:
+        return self.__scroll_to(self.__top + rows)
+
+    @invalidate
+    def scroll_to(self, row: int) -> bool:
+        return self.__scroll_to(row)
+
+    @invalidate
+    def scroll_columns(self, columns: int) -> bool:
+        left = max(0, min(self.__left + columns, len(self.__columns) - 1))
+        if left == self.__left:
+            return False
+        self.__left = left
+        return True
+
+    @property
+    def top(self) -> int:
+        return self.__top
+
+    def __scroll_to(self, row: int) -> bool:
+        row = max(0, min(row, len(self.__view) - 1))
+        if row == self.__top:
+            return False
+        self.__top = row
+        return True
+
+    # --- Rendering ---
+    def render(self):
+        height, width = self.size
+        columns = self.__visible_columns(width)
+
+        header = " ".join(self.__pad(column.name, column, False) for _, column in columns)
+        self._draw(0, 0, header[:width], curses.A_REVERSE)
+
+        view = self.__view
+        end = min(len(view), self.__top + height - 1)
+        for line, position in enumerate(range(self.__top, end), start=1):
+            row = int(view[position])
+            text = " ".join(self.__cell(row, index, column) for index, column in columns)
+            self._draw(line, 0, text[:width])
+
+    def __visible_columns(self, width: int) -> list[tuple[int, Column]]:
+        visible = []
+        used = 0
+        for index in range(self.__left, len(self.__columns)):
+            if used >= width:
+                break
+            column = self.__columns[index]
+            visible.append((index, column))
+            used += column.width + 1
+        return visible
+
+    def __cell(self, row: int, index: int, column: Column) -> str:
+        key = (index, row)
+        text = self.__cells.get(key)
+        if text is None:
+            text = self.__pad(format(self.__data[index][row], column.format), column, self.__numeric[index])
+            self.__cells.put(key, text)
+        return text
+
+    @staticmethod
+    def __pad(text: str, column: Column, numeric: bool) -> str:
+        align = column.align or (">" if numeric else "<")
+        if len(text) > column.width:
+            return text[:column.width]
+        return text.rjust(column.width) if align == ">" else text.ljust(column.width)
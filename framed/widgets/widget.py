@@ -57,10 +57,42 @@ class Widget(metaclass=ABCMeta):
         """
         raise NotImplementedError()
 
-    def _repaint(self):
+    def update(self):
+        """
+        Brings the widget's window up to date after it has been
+        invalidated, when the rest of its window is known to be
+        intact. By default, the widget is erased and rendered
+        again, but widgets which can cheaply redraw only what
+        changed should override this.
+        """
         self._window.erase()
         self.render()
-        self._window.refresh()
+
+    def _repaint(self):
+        if self.__parent is not None:
+            self.__parent._invalidate_child(self)
+        else:
+            self._window.erase()
+            self.render()
+            self._window.refresh()
+
+    def _draw(self, y: int, x: int, text: str, attr: int = 0, limit: int | None = None):
+        """
+        Draws text at (y, x) in the widget's window, cut off after
+        limit characters if a limit is given. Text running past the
+        window's edge is discarded.
+        """
+        try:
+            if limit is None:
+                self._window.addstr(y, x, text, attr)
+            else:
+                self._window.addnstr(y, x, text, limit, attr)
+        except curses.error:
+            # writing the bottom-right cell fails after the character is written
+            pass
+
+    def _invalidate_child(self, widget: Widget):
+        self._repaint()
 
     @property
     def size(self) -> vec2:
@@ -69,6 +101,15 @@ class Widget(metaclass=ABCMeta):
     def set_size(self, size: vec2):
         self.__size = size
 
+    def on_mouse(self, event: MouseEvent) -> bool:
+        """
+        Handles a mouse event over the widget, or a drag which began
+        on it. event.local is relative to the widget. Returns True
+        if the event was handled; otherwise, it is passed on to the
+        widget's panel.
+        """
+        return False
+
     def request_update(self) -> bool:
         if self.__parent is not None:
             return self.__parent.request_update()
@@ -81,14 +122,21 @@ class Widget(metaclass=ABCMeta):
     def _orphan(self):
         self.__parent = None
 
-def invalidate(method: typing.Callable[..., bool]):
+_WidgetType = typing.TypeVar("_WidgetType", bound=Widget)
+_Params = typing.ParamSpec("_Params")
+
+
+def invalidate(
+    method: typing.Callable[typing.Concatenate[_WidgetType, _Params], bool]
+) -> typing.Callable[typing.Concatenate[_WidgetType, _Params], None]:
     @functools.wraps(method)
-    def with_invalidate(self, *args, **kwargs):
+    def with_invalidate(self: _WidgetType, *args: _Params.args, **kwargs: _Params.kwargs):
         should_invalidate = method(self, *args, **kwargs)
-        if should_invalidate and self.windowed is not None and self.request_update():
+        if should_invalidate and self.windowed and self.request_update():
             self._repaint()
 
     return with_invalidate
 
 if typing.TYPE_CHECKING:
+    from ..mouse import MouseEvent
     from ..panel import Panel
@@ -33,19 +33,11 @@ def main(stdscr: curses.window):
 
     manager.set_active_panel(0)
 
-    def handle_input(ch: int):
-        if ch == curses.KEY_F1:
-            manager.set_active_panel(0)
-        elif ch == curses.KEY_F2:
-            manager.set_active_panel(1)
-        elif ch == curses.KEY_F3:
-            first.set_label_text("Something else")
-        elif ch == curses.KEY_F4:
-            second.set_label_text("Something else 2")
-        elif ch == 3:
-            app.quit()
-
-    app.set_control_handler(handle_input)
+    app.keymap.bind("F1", lambda: manager.set_active_panel(0))
+    app.keymap.bind("F2", lambda: manager.set_active_panel(1))
+    app.keymap.bind("F3", lambda: first.set_label_text("Something else"))
+    app.keymap.bind("F4", lambda: second.set_label_text("Something else 2"))
+    app.keymap.bind("C-c", app.quit)
 
     app.run()
 